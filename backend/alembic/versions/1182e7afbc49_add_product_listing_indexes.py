@@ -0,0 +1,39 @@
+"""Add product listing indexes
+
+Revision ID: 1182e7afbc49
+Revises: 87c3cd3f6779
+Create Date: 2026-10-15 10:31:54.902177
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1182e7afbc49'
+down_revision: Union[str, Sequence[str], None] = '87c3cd3f6779'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_category_is_available', 'products', ['category', 'is_available'])
+
+    # Trigram index so ILIKE '%term%' name searches can avoid a sequential scan
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_products_name_trgm', 'products', ['name'],
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_products_name_trgm', table_name='products')
+    op.drop_index('ix_products_category_is_available', table_name='products')
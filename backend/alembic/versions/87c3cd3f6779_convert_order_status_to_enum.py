@@ -0,0 +1,59 @@
+"""Convert order status to a native enum
+
+Revision ID: 87c3cd3f6779
+Revises: d5383e217b5c
+Create Date: 2026-10-15 10:02:17.418903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '87c3cd3f6779'
+down_revision: Union[str, Sequence[str], None] = 'd5383e217b5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_STATUSES = ('PENDING', 'CONFIRMED', 'SHIPPED', 'DELIVERED', 'CANCELLED')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        order_status_enum = postgresql.ENUM(*ORDER_STATUSES, name='orderstatus')
+        order_status_enum.create(op.get_bind(), checkfirst=True)
+        op.alter_column(
+            'orders', 'status',
+            type_=order_status_enum,
+            existing_type=sa.String(),
+            existing_nullable=False,
+            postgresql_using='status::orderstatus'
+        )
+    else:
+        # No native enum type, so constrain the text column instead
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.create_check_constraint(
+                'orderstatus',
+                sa.column('status').in_(ORDER_STATUSES)
+            )
+    # ix_orders_status already exists from 931366abc0c3
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'orders', 'status',
+            type_=sa.String(),
+            existing_type=postgresql.ENUM(*ORDER_STATUSES, name='orderstatus'),
+            existing_nullable=False,
+            postgresql_using='status::text'
+        )
+        postgresql.ENUM(name='orderstatus').drop(op.get_bind(), checkfirst=True)
+    else:
+        with op.batch_alter_table('orders') as batch_op:
+            batch_op.drop_constraint('orderstatus', type_='check')
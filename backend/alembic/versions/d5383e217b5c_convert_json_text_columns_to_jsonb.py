@@ -0,0 +1,60 @@
+"""Convert JSON text columns to native JSON/JSONB
+
+Revision ID: d5383e217b5c
+Revises: 10bc8a133989
+Create Date: 2026-10-15 09:12:41.203518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5383e217b5c'
+down_revision: Union[str, Sequence[str], None] = '10bc8a133989'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite keeps JSON as text, so existing rows are already in the right format
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'products', 'images',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='images::jsonb'
+    )
+    op.alter_column(
+        'orders', 'shipping_address',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='shipping_address::jsonb'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.alter_column(
+        'orders', 'shipping_address',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='shipping_address::text'
+    )
+    op.alter_column(
+        'products', 'images',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='images::text'
+    )
@@ -2,21 +2,46 @@
 Authentication utilities for the Vintage Store
 Handles JWT token generation, validation, and password hashing
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 import os
+import threading
+import time
+import uuid
+
+from .token_store import revocation_store
 
 # Password hashing context - using pbkdf2_sha256 as a more reliable alternative
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+# Dedicated threads for password hashing so KDF work neither blocks the event
+# loop nor competes with DB calls in the default threadpool
+_kdf_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="kdf")
+
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Decoded claims of recently verified tokens, keyed by the raw token and kept until exp
+CLAIMS_CACHE_MAX_SIZE = 10_000
+_claims_cache: Dict[str, Dict[str, Any]] = {}
+_claims_cache_lock = threading.Lock()
+
+
+def _cache_claims(token: str, payload: Dict[str, Any]) -> None:
+    """Remember verified claims, evicting the oldest entry when full"""
+    with _claims_cache_lock:
+        if len(_claims_cache) >= CLAIMS_CACHE_MAX_SIZE:
+            _claims_cache.pop(next(iter(_claims_cache)))
+        _claims_cache[token] = payload
+
+
 class AuthService:
     """Authentication service for handling JWT tokens and password operations"""
     
@@ -30,6 +55,26 @@ class AuthService:
         """Hash a password using pbkdf2_sha256"""
         return pwd_context.hash(password)
     
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verify a password on the KDF executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _kdf_executor, pwd_context.verify, plain_password, hashed_password
+        )
+    
+    @staticmethod
+    async def dummy_verify_async() -> None:
+        """Spend the time of a password check on the KDF executor without a stored hash"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_kdf_executor, pwd_context.dummy_verify)
+    
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        """Hash a password on the KDF executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_kdf_executor, pwd_context.hash, password)
+    
     @staticmethod
     def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token"""
@@ -39,22 +84,44 @@ class AuthService:
         else:
             expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
     
     @staticmethod
     def verify_token(token: str) -> Dict[str, Any]:
         """Verify and decode a JWT token"""
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
-        except JWTError:
+        payload = _claims_cache.get(token)
+        if payload is None or payload.get("exp", 0) <= time.time():
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                _claims_cache.pop(token, None)
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Could not validate credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            if "exp" in payload:
+                _cache_claims(token, payload)
+        
+        # Checked on every call, so revocation applies to cached tokens too
+        jti = payload.get("jti")
+        if jti and revocation_store.is_revoked(jti):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
+                detail="Token has been revoked",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        return payload
+    
+    @staticmethod
+    def revoke_token(token: str) -> None:
+        """Revoke a JWT token for the rest of its lifetime"""
+        payload = AuthService.verify_token(token)
+        jti = payload.get("jti")
+        if jti:
+            revocation_store.revoke(jti, payload["exp"])
     
     @staticmethod
     def get_user_id_from_token(token: str) -> int:
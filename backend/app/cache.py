@@ -0,0 +1,64 @@
+"""
+In-process TTL cache for hot, rarely changing reads such as the product catalog.
+Entries are keyed by a version number that writers bump to invalidate everything.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Small thread-safe TTL cache with version-based invalidation and single-flight loads"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss.
+        Concurrent misses for the same key wait for a single load.
+        A loader result of None is returned but not cached.
+        """
+        versioned_key = (self.version, key)
+        entry = self._entries.get(versioned_key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        with self._lock:
+            key_lock = self._loading.setdefault(versioned_key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have filled the entry while we waited
+            entry = self._entries.get(versioned_key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+
+            try:
+                value = loader()
+                # None means "not found"; don't pin a miss for the whole TTL
+                if value is not None:
+                    with self._lock:
+                        if versioned_key[0] == self.version:
+                            if len(self._entries) >= self.maxsize:
+                                self._entries.pop(next(iter(self._entries)))
+                            self._entries[versioned_key] = (time.monotonic() + self.ttl, value)
+            finally:
+                # Release the per-key lock even when the loader raises
+                with self._lock:
+                    self._loading.pop(versioned_key, None)
+            return value
+
+    def invalidate(self) -> None:
+        """Drop every entry by moving to a new version"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+# Product catalog reads (list pages and single products)
+product_cache = TTLCache(maxsize=1024, ttl=30.0)
@@ -5,7 +5,7 @@ import os
 import json
 from typing import Optional, Any
 from pydantic import Field, field_validator, model_validator
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -33,6 +33,9 @@ class Settings(BaseSettings):
         description="JWT access token expiration in minutes"
     )
     
+    # Token revocation store (falls back to in-process memory when unset)
+    REDIS_URL: Optional[str] = Field(default=None, description="Redis URL for the token blacklist")
+    
     # Upload Configuration
     upload_dir: str = Field(
         default="uploads",
@@ -57,25 +60,27 @@ class Settings(BaseSettings):
         description="CORS origins as JSON string or comma-separated"
     )
     
-    @model_validator(mode='after')
+    @model_validator(mode='before')
     @classmethod
-    def parse_cors_origins_after_validation(cls, model: 'Settings') -> 'Settings':
-        """Parse CORS_ORIGINS after validation and set cors_origins"""
-        if model.CORS_ORIGINS and model.CORS_ORIGINS.strip():
+    def parse_cors_origins_before_validation(cls, data: Any) -> Any:
+        """Parse CORS_ORIGINS into cors_origins before validation (the model is frozen)"""
+        if not isinstance(data, dict):
+            return data
+        raw = data.get('CORS_ORIGINS')
+        if isinstance(raw, str) and raw.strip():
             try:
                 # Try parsing as JSON first
-                parsed = json.loads(model.CORS_ORIGINS)
+                parsed = json.loads(raw)
                 if isinstance(parsed, list):
                     # Normalize origins to ensure they have protocols
-                    model.cors_origins = [cls._normalize_origin(origin) for origin in parsed]
-                    return model
+                    return {**data, 'cors_origins': [cls._normalize_origin(origin) for origin in parsed]}
             except (json.JSONDecodeError, TypeError, ValueError):
                 # If not JSON, treat as comma-separated string
-                origins = [origin.strip() for origin in model.CORS_ORIGINS.split(',') if origin.strip()]
+                origins = [origin.strip() for origin in raw.split(',') if origin.strip()]
                 if origins:
                     # Normalize origins to ensure they have protocols
-                    model.cors_origins = [cls._normalize_origin(origin) for origin in origins]
-        return model
+                    return {**data, 'cors_origins': [cls._normalize_origin(origin) for origin in origins]}
+        return data
     
     def get_cors_origins(self) -> list[str]:
         """Get CORS origins, parsing from CORS_ORIGINS env var if provided"""
@@ -125,11 +130,13 @@ class Settings(BaseSettings):
     # Logging Configuration
     log_level: str = Field(default="INFO", description="Logging level")
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True  # Make case-sensitive so CORS_ORIGINS doesn't map to cors_origins
-        extra = "ignore"  # Ignore extra fields from environment
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,  # Make case-sensitive so CORS_ORIGINS doesn't map to cors_origins
+        extra="ignore",  # Ignore extra fields from environment
+        frozen=True  # Parsed once at import; read-only afterwards
+    )
 
 
 # Global settings instance
@@ -148,6 +155,11 @@ def get_jwt_secret() -> str:
     return settings.SECRET_KEY or settings.jwt_secret_key
 
 
+def get_redis_url() -> Optional[str]:
+    """Get Redis URL for the token revocation store"""
+    return settings.REDIS_URL
+
+
 def get_upload_dir() -> str:
     """Get upload directory path"""
     return settings.upload_dir
@@ -2,15 +2,36 @@
 Database service for the Vintage Store
 Handles all database operations using SQLAlchemy ORM
 """
+import base64
+import binascii
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, and_, or_
-from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
+from sqlalchemy import select, insert, update, func, and_, or_
+from sqlalchemy.orm import selectinload, raiseload
+from typing import Iterable, List, Optional, Dict, Any
 from decimal import Decimal
 from .models import User, Product, Order, OrderItem, OrderStatus
 from .database_config import SessionLocal
 from .auth import AuthService
-import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the ID of the last row on a page as an opaque cursor"""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _next_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after rows, or None when this is the last page"""
+    return encode_cursor(rows[-1].id) if rows and len(rows) == limit else None
+
 
 class DatabaseService:
     """Database service class for handling all database operations"""
@@ -28,12 +49,17 @@ class DatabaseService:
         page: int = 1, 
         limit: int = 10, 
         category: Optional[str] = None,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Get products with optional filtering and pagination"""
+        """
+        Get products with optional filtering and pagination.
+        When a cursor is given, page is ignored and rows after the cursor are
+        returned (keyset pagination), so deep pages cost the same as the first.
+        """
         with self.get_session() as session:
             # Build query
-            query = select(Product).where(Product.is_available == True)
+            query = select(Product).where(Product.is_available == True).options(raiseload("*"))
             
             if category:
                 query = query.where(Product.category == category)
@@ -50,9 +76,14 @@ class DatabaseService:
             total_result = session.execute(count_query)
             total = total_result.scalar()
             
-            # Get paginated results
-            offset = (page - 1) * limit
-            query = query.order_by(Product.created_at.desc()).offset(offset).limit(limit)
+            # Get paginated results, newest first by id. Both paths order by
+            # the keyset so a cursor picks up exactly where a page left off.
+            query = query.order_by(Product.id.desc())
+            if cursor:
+                query = query.where(Product.id < decode_cursor(cursor))
+            else:
+                query = query.offset((page - 1) * limit)
+            query = query.limit(limit)
             
             result = session.execute(query)
             products = result.scalars().all()
@@ -66,7 +97,7 @@ class DatabaseService:
                     "description": product.description,
                     "price": float(product.price),
                     "category": product.category,
-                    "images": product.get_images(),
+                    "images": tuple(product.images or ()),
                     "is_available": product.is_available,
                     "created_at": product.created_at.isoformat(),
                     "updated_at": product.updated_at.isoformat()
@@ -77,7 +108,8 @@ class DatabaseService:
                 "items": products_data,
                 "total": total,
                 "page": page,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": _next_cursor(products, limit)
             }
     
     def get_product(self, product_id: int) -> Optional[Dict[str, Any]]:
@@ -96,20 +128,37 @@ class DatabaseService:
                 "description": product.description,
                 "price": float(product.price),
                 "category": product.category,
-                "images": product.get_images(),
+                "images": tuple(product.images or ()),
                 "is_available": product.is_available,
                 "created_at": product.created_at.isoformat(),
                 "updated_at": product.updated_at.isoformat()
             }
     
+    def get_products_by_ids(self, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get the products matching the given IDs in a single query"""
+        if not product_ids:
+            return []
+        
+        with self.get_session() as session:
+            query = select(
+                Product.id, Product.name, Product.price, Product.is_available
+            ).where(Product.id.in_(set(product_ids)))
+            result = session.execute(query)
+            
+            return [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "price": row.price,  # Decimal, so order totals stay exact
+                    "is_available": row.is_available
+                }
+                for row in result
+            ]
+    
     def create_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new product"""
         with self.get_session() as session:
-            # Handle images list
-            images = product_data.pop("images", [])
-            
             product = Product(**product_data)
-            product.set_images(images)
             
             session.add(product)
             session.commit()
@@ -121,12 +170,23 @@ class DatabaseService:
                 "description": product.description,
                 "price": float(product.price),
                 "category": product.category,
-                "images": product.get_images(),
+                "images": tuple(product.images or ()),
                 "is_available": product.is_available,
                 "created_at": product.created_at.isoformat(),
                 "updated_at": product.updated_at.isoformat()
             }
     
+    def create_products_bulk(self, products_data: List[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Insert many products with Core executemany, batch_size rows per
+        statement, in one transaction. Returns the number of rows inserted.
+        """
+        with self.get_session() as session:
+            for start in range(0, len(products_data), batch_size):
+                session.execute(insert(Product), products_data[start:start + batch_size])
+            session.commit()
+        return len(products_data)
+    
     def update_product(self, product_id: int, product_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a product"""
         with self.get_session() as session:
@@ -137,11 +197,7 @@ class DatabaseService:
             if not product:
                 raise ValueError("Product not found")
             
-            # Handle images if provided
-            if "images" in product_data:
-                product.set_images(product_data.pop("images"))
-            
-            # Update other fields
+            # Update fields
             for key, value in product_data.items():
                 setattr(product, key, value)
             
@@ -154,7 +210,7 @@ class DatabaseService:
                 "description": product.description,
                 "price": float(product.price),
                 "category": product.category,
-                "images": product.get_images(),
+                "images": tuple(product.images or ()),
                 "is_available": product.is_available,
                 "created_at": product.created_at.isoformat(),
                 "updated_at": product.updated_at.isoformat()
@@ -180,19 +236,19 @@ class DatabaseService:
                 "description": product.description,
                 "price": float(product.price),
                 "category": product.category,
-                "images": product.get_images(),
+                "images": tuple(product.images or ()),
                 "is_available": product.is_available,
                 "created_at": product.created_at.isoformat(),
                 "updated_at": product.updated_at.isoformat()
             }
     
     # User operations
-    def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
+    def create_user(self, user_data: Dict[str, Any], password_hashed: bool = False) -> Dict[str, Any]:
         """Create a new user with hashed password"""
         with self.get_session() as session:
-            # Hash the password before storing
-            hashed_password = AuthService.get_password_hash(user_data["password"])
-            user_data["password"] = hashed_password
+            # Hash the password before storing, unless the caller already did
+            if not password_hashed:
+                user_data["password"] = AuthService.get_password_hash(user_data["password"])
             
             user = User(**user_data)
             session.add(user)
@@ -274,38 +330,49 @@ class DatabaseService:
     
     # Order operations
     def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new order with items"""
+        """
+        Create a new order with items.
+        The total is derived here from the item prices in Decimal, so it always
+        matches the stored line items and never passes through float.
+        """
         with self.get_session() as session:
-            # Handle shipping address and items
-            shipping_address = order_data.pop("shipping_address", None)
+            # Handle items
             items = order_data.pop("items", [])
+            order_data["total_amount"] = sum(
+                (Decimal(item["price"]) * item["quantity"] for item in items),
+                Decimal("0")
+            )
             
             # Create the order
             order = Order(**order_data)
-            if shipping_address:
-                order.set_shipping_address(shipping_address)
             
             session.add(order)
             session.flush()  # Get the order ID without committing
             
             # Create order items
-            order_items = []
-            for item in items:
-                order_item = OrderItem(
+            order_items = [
+                OrderItem(
                     order_id=order.id,
                     product_id=item["product_id"],
                     quantity=item["quantity"],
                     price=item["price"],
                     product_name=item["product_name"]
                 )
-                session.add(order_item)
-                order_items.append({
+                for item in items
+            ]
+            session.add_all(order_items)
+            session.flush()  # Assign item IDs
+            
+            items_data = [
+                {
                     "id": order_item.id,
                     "product_id": order_item.product_id,
                     "quantity": order_item.quantity,
                     "price": float(order_item.price),
                     "product_name": order_item.product_name
-                })
+                }
+                for order_item in order_items
+            ]
             
             session.commit()
             session.refresh(order)
@@ -314,9 +381,9 @@ class DatabaseService:
                 "id": order.id,
                 "user_id": order.user_id,
                 "total_amount": float(order.total_amount),
-                "status": order.status,
-                "shipping_address": order.get_shipping_address(),
-                "items": order_items,
+                "status": order.status.value,
+                "shipping_address": order.shipping_address,
+                "items": items_data,
                 "created_at": order.created_at.isoformat(),
                 "updated_at": order.updated_at.isoformat()
             }
@@ -325,7 +392,8 @@ class DatabaseService:
         """Get all orders for a user"""
         with self.get_session() as session:
             query = select(Order).where(Order.user_id == user_id).options(
-                selectinload(Order.items)
+                selectinload(Order.items),
+                raiseload("*")
             ).order_by(Order.created_at.desc())
             
             result = session.execute(query)
@@ -347,8 +415,8 @@ class DatabaseService:
                     "id": order.id,
                     "user_id": order.user_id,
                     "total_amount": float(order.total_amount),
-                    "status": order.status,
-                    "shipping_address": order.get_shipping_address(),
+                    "status": order.status.value,
+                    "shipping_address": order.shipping_address,
                     "items": items_data,
                     "created_at": order.created_at.isoformat(),
                     "updated_at": order.updated_at.isoformat()
@@ -361,7 +429,8 @@ class DatabaseService:
         with self.get_session() as session:
             query = select(Order).where(Order.id == order_id).options(
                 selectinload(Order.items),
-                selectinload(Order.user)
+                selectinload(Order.user),
+                raiseload("*")
             )
             
             result = session.execute(query)
@@ -384,8 +453,8 @@ class DatabaseService:
                 "id": order.id,
                 "user_id": order.user_id,
                 "total_amount": float(order.total_amount),
-                "status": order.status,
-                    "shipping_address": order.get_shipping_address(),
+                "status": order.status.value,
+                    "shipping_address": order.shipping_address,
                 "items": items_data,
                 "user": {
                     "id": order.user.id,
@@ -397,6 +466,40 @@ class DatabaseService:
                 "updated_at": order.updated_at.isoformat()
             }
     
+    def get_user_order(self, order_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a single order by ID, only if it belongs to the given user"""
+        with self.get_session() as session:
+            query = select(Order).where(
+                Order.id == order_id,
+                Order.user_id == user_id
+            ).options(selectinload(Order.items), raiseload("*"))
+            
+            result = session.execute(query)
+            order = result.scalar_one_or_none()
+            
+            if not order:
+                return None
+            
+            items_data = []
+            for item in order.items:
+                items_data.append({
+                    "id": item.id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "price": float(item.price),
+                    "product_name": item.product_name
+                })
+            
+            return {
+                "id": order.id,
+                "user_id": order.user_id,
+                "total_amount": float(order.total_amount),
+                "status": order.status.value,
+                "shipping_address": order.shipping_address,
+                "items": items_data,
+                "created_at": order.created_at.isoformat(),
+                "updated_at": order.updated_at.isoformat()
+            }
     
     def update_order_status(self, order_id: int, status: str) -> Dict[str, Any]:
         """Update order status"""
@@ -416,24 +519,57 @@ class DatabaseService:
                 "id": order.id,
                 "user_id": order.user_id,
                 "total_amount": float(order.total_amount),
-                "status": order.status,
-                    "shipping_address": order.get_shipping_address(),
+                "status": order.status.value,
+                    "shipping_address": order.shipping_address,
                 "created_at": order.created_at.isoformat(),
                 "updated_at": order.updated_at.isoformat()
             }
 
+    def update_order_status_for_user(
+        self,
+        order_id: int,
+        user_id: int,
+        status: str,
+        blocked_statuses: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Set an order's status in a single UPDATE ... RETURNING, only if it
+        belongs to the user and its current status is not in blocked_statuses.
+        Returns None when no row matched, leaving the caller to work out why.
+        """
+        with self.get_session() as session:
+            query = update(Order).where(
+                Order.id == order_id,
+                Order.user_id == user_id
+            )
+            blocked = list(blocked_statuses)
+            if blocked:
+                query = query.where(Order.status.not_in(blocked))
+            query = query.values(status=status).returning(Order.id, Order.status)
+            
+            row = session.execute(query).one_or_none()
+            session.commit()
+            
+            if row is None:
+                return None
+            return {"id": row.id, "status": row.status.value}
+
     # Admin operations
-    def get_all_users(self, page: int = 1, limit: int = 100) -> Dict[str, Any]:
-        """Get all users with pagination (admin only)"""
+    def get_all_users(self, page: int = 1, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Get all users with pagination (admin only), by page or by cursor"""
         with self.get_session() as session:
             # Get total count
             count_query = select(func.count(User.id))
             total_result = session.execute(count_query)
             total = total_result.scalar()
             
-            # Get paginated results
-            offset = (page - 1) * limit
-            query = select(User).order_by(User.created_at.desc()).offset(offset).limit(limit)
+            # Get paginated results, ordered by the id keyset on both paths
+            query = select(User).options(raiseload("*")).order_by(User.id.desc())
+            if cursor:
+                query = query.where(User.id < decode_cursor(cursor))
+            else:
+                query = query.offset((page - 1) * limit)
+            query = query.limit(limit)
             
             result = session.execute(query)
             users = result.scalars().all()
@@ -454,7 +590,8 @@ class DatabaseService:
                 "items": users_data,
                 "total": total,
                 "page": page,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": _next_cursor(users, limit)
             }
 
     def update_user_admin_status(self, user_id: int, is_admin: bool) -> Dict[str, Any]:
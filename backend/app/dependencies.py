@@ -18,7 +18,7 @@ def get_database_service() -> DatabaseService:
     return DatabaseService()
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: DatabaseService = Depends(get_database_service)
 ) -> UserResponse:
@@ -63,8 +63,8 @@ async def get_current_user(
         )
 
 
-async def get_current_user_optional(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+def get_current_user_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: DatabaseService = Depends(get_database_service)
 ) -> Optional[UserResponse]:
     """
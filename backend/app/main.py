@@ -7,6 +7,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
+from .middleware import HealthCheckMiddleware
+from .responses import JSONResponse
 from .routers import (
     auth_router,
     products_router,
@@ -19,7 +21,9 @@ from .routers import (
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
-    description="API for Seraphany Archive vintage clothing store"
+    description="API for Seraphany Archive vintage clothing store",
+    # Serialize every response with orjson instead of the stdlib json module
+    default_response_class=JSONResponse,
 )
 
 # Configure CORS for frontend communication
@@ -31,6 +35,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Health checks are answered before CORS and routing (last added runs first)
+app.add_middleware(HealthCheckMiddleware)
+
 # Serve uploaded files
 app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
 
@@ -42,13 +49,6 @@ app.include_router(uploads_router)
 app.include_router(users_router)
 
 
-# Health check endpoint
-@app.get("/health", tags=["Health"])
-async def health_check():
-    """Health check endpoint for monitoring."""
-    return {"status": "healthy", "message": "Vintage Store API is running"}
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
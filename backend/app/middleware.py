@@ -0,0 +1,34 @@
+"""
+ASGI middleware for the backend application
+"""
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+HEALTH_PATH = "/health"
+HEALTH_BODY = b'{"status":"healthy","message":"Vintage Store API is running"}'
+
+
+class HealthCheckMiddleware:
+    """
+    Answer load balancer health checks before any other middleware or routing runs.
+    Registered last so it is the outermost user middleware.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(HEALTH_BODY)).encode()),
+        ]
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] != HEALTH_PATH
+            or scope["method"] not in ("GET", "HEAD")
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        await send({"type": "http.response.start", "status": 200, "headers": self._headers})
+        body = HEALTH_BODY if scope["method"] == "GET" else b""
+        await send({"type": "http.response.body", "body": body})
@@ -2,16 +2,19 @@
 SQLAlchemy models for the Vintage Store
 Based on the original Prisma schema
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, Numeric, Text, JSON, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from enum import Enum
-import json
 
 Base = declarative_base()
 
+# Decoded by the driver: JSONB on Postgres, JSON text elsewhere (e.g. SQLite)
+JSONType = JSON().with_variant(JSONB, "postgresql")
+
 
 class OrderStatus(str, Enum):
     """Order status enumeration"""
@@ -35,8 +38,14 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    # Relationships
-    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
+    # Relationships (lazy="raise" so accidental per-row loads fail fast instead of issuing N+1 SELECTs)
+    orders = relationship(
+        "Order",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+    )
 
 
 class Product(Base):
@@ -48,7 +57,7 @@ class Product(Base):
     description = Column(Text, nullable=False)
     price = Column(Numeric(10, 2), nullable=False)  # 10 digits total, 2 decimal places
     category = Column(String, nullable=False)
-    images = Column(Text)  # JSON string of image URLs
+    images = Column(JSONType)  # List of image URLs
     is_available = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -56,15 +65,17 @@ class Product(Base):
     # Relationships
     order_items = relationship("OrderItem", back_populates="product")
     
-    def get_images(self):
-        """Get images as a list"""
-        if self.images:
-            return json.loads(self.images)
-        return []
-    
-    def set_images(self, images_list):
-        """Set images from a list"""
-        self.images = json.dumps(images_list)
+    __table_args__ = (
+        # Catalog listing filters on category and availability
+        Index("ix_products_category_is_available", "category", "is_available"),
+        # Lets ILIKE '%term%' name searches use an index (requires pg_trgm)
+        Index(
+            "ix_products_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
 
 class Order(Base):
@@ -74,8 +85,14 @@ class Order(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     total_amount = Column(Numeric(10, 2), nullable=False)
-    status = Column(String, default="PENDING", nullable=False)
-    shipping_address = Column(Text)  # JSON string for flexibility
+    # Native enum on Postgres, CHECK-constrained VARCHAR elsewhere; indexed for status filters
+    status = Column(
+        SQLEnum(OrderStatus, name="orderstatus", create_constraint=True),
+        default=OrderStatus.PENDING,
+        nullable=False,
+        index=True,
+    )
+    shipping_address = Column(JSONType)  # Address dict, JSON for flexibility
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -83,15 +100,10 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     
-    def get_shipping_address(self):
-        """Get shipping address as a dict"""
-        if self.shipping_address:
-            return json.loads(self.shipping_address)
-        return None
-    
-    def set_shipping_address(self, address_dict):
-        """Set shipping address from a dict"""
-        self.shipping_address = json.dumps(address_dict)
+    __table_args__ = (
+        # A user's order history, newest first
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+    )
 
 
 class OrderItem(Base):
@@ -99,14 +111,14 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Numeric(10, 2), nullable=False)  # Price at time of purchase
     product_name = Column(String, nullable=False)  # Denormalized for performance
     
     # Relationships
     order = relationship("Order", back_populates="items")
-    product = relationship("Product", back_populates="order_items")
+    product = relationship("Product", back_populates="order_items", lazy="raise")
 
 
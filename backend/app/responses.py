@@ -0,0 +1,29 @@
+"""
+Response classes for the backend application
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _orjson_default(value: Any) -> Any:
+    """Encode types orjson doesn't handle natively"""
+    if isinstance(value, Decimal):
+        # Money fields are exposed as JSON numbers, matching the float response schemas
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class JSONResponse(ORJSONResponse):
+    """orjson-backed JSON response that also encodes Decimal values and sets"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS,
+        )
@@ -1,11 +1,17 @@
 """
 Authentication router - handles user registration, login, logout, and token management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import ValidationError
 
 from ..database import DatabaseService
 from ..auth import AuthService
-from ..dependencies import get_database_service, get_current_user
+from ..dependencies import get_database_service, get_current_user, security
+from ..responses import JSONResponse
 from ..schemas import (
     UserCreate,
     UserLogin,
@@ -18,21 +24,51 @@ from ..schemas import (
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": UserCreate.model_json_schema()}},
+        }
+    },
+)
 async def register_user(
-    user: UserCreate,
+    request: Request,
     db: DatabaseService = Depends(get_database_service)
 ):
-    """Register a new user."""
+    """
+    Register a new user.
+    The body is parsed by hand so obviously weak passwords are rejected
+    before the full UserCreate validation (including the email check) runs.
+    """
+    try:
+        raw = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {}}]
+        )
+    
     # Basic validation
-    if len(user.password) < 8:
+    password = raw.get("password") if isinstance(raw, dict) else None
+    if isinstance(password, str) and len(password) < 8:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password must be at least 8 characters"
         )
     
+    try:
+        user = UserCreate.model_validate(raw)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=raw,
+        )
+    
     # Check if user already exists
-    existing_user = db.get_user_by_email(user.email)
+    existing_user = await run_in_threadpool(db.get_user_by_email, user.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,10 +80,10 @@ async def register_user(
         "email": user.email,
         "first_name": user.first_name,
         "last_name": user.last_name,
-        "password": user.password
+        "password": await AuthService.get_password_hash_async(user.password)
     }
     
-    new_user = db.create_user(user_data)
+    new_user = await run_in_threadpool(db.create_user, user_data, True)
     
     return UserResponse(
         id=new_user["id"],
@@ -58,15 +94,23 @@ async def register_user(
     )
 
 
-@router.post("/login", response_model=TokenResponse)
+@router.post("/login", responses={status.HTTP_200_OK: {"model": TokenResponse}})
 async def login_user(
     credentials: UserLogin,
     db: DatabaseService = Depends(get_database_service)
 ):
-    """Login user and return JWT token."""
-    # Verify user credentials
-    user = db.verify_user_credentials(credentials.email, credentials.password)
+    """
+    Login user and return JWT token.
+    The fixed-shape token body is serialized directly with orjson.
+    """
+    # Verify user credentials, with the password check on the KDF executor
+    user = await run_in_threadpool(db.get_user_by_email, credentials.email)
     if not user:
+        # Do the same KDF work as a real check so response time doesn't reveal unknown emails
+        await AuthService.dummy_verify_async()
+    if not user or not await AuthService.verify_password_async(
+        credentials.password, user["password"]
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -75,7 +119,7 @@ async def login_user(
     # Create JWT token
     access_token = AuthService.create_access_token(data={"sub": str(user["id"])})
     
-    return TokenResponse(access_token=access_token, token_type="bearer")
+    return JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
 
 
 @router.get("/me", response_model=UserResponse)
@@ -86,17 +130,17 @@ async def get_current_user_info(
     return current_user
 
 
-@router.post("/logout", response_model=MessageResponse)
-async def logout_user(
-    current_user: UserResponse = Depends(get_current_user)
+@router.post("/logout", responses={status.HTTP_200_OK: {"model": MessageResponse}})
+def logout_user(
+    current_user: UserResponse = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
-    """Logout user."""
-    # For JWT tokens, logout is handled client-side by removing the token
-    # In a more sophisticated setup, you might maintain a blacklist of tokens
-    return MessageResponse(message="Successfully logged out")
+    """Logout user by revoking the current token."""
+    AuthService.revoke_token(credentials.credentials)
+    return JSONResponse(content={"message": "Successfully logged out"})
 
 
-@router.post("/refresh", response_model=TokenResponse)
+@router.post("/refresh", responses={status.HTTP_200_OK: {"model": TokenResponse}})
 async def refresh_token(token_data: TokenRefresh):
     """Refresh JWT token."""
     try:
@@ -113,7 +157,7 @@ async def refresh_token(token_data: TokenRefresh):
         # Create new token
         access_token = AuthService.create_access_token(data={"sub": user_id})
         
-        return TokenResponse(access_token=access_token, token_type="bearer")
+        return JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
         
     except HTTPException:
         raise
@@ -1,10 +1,19 @@
 """
 Products router - handles product CRUD operations
+
+The public GET endpoints serve trusted DatabaseService dicts and skip
+response_model validation, serializing straight to JSON; their schemas are
+still published through `responses=`. Write endpoints keep response_model so
+validation catches mistakes where they are most likely.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Optional
+import hashlib
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import Any, Optional
 
+from ..cache import product_cache
 from ..database import DatabaseService
+from ..responses import JSONResponse
 from ..dependencies import get_database_service, get_admin_user
 from ..schemas import (
     ProductCreate,
@@ -15,37 +24,89 @@ from ..schemas import (
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Listings may be reused by browsers and CDNs for as long as the server-side cache holds them
+LIST_CACHE_CONTROL = f"public, max-age={int(product_cache.ttl)}"
+
+
+def _make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the values that identify a response version"""
+    digest = hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
 
-@router.get("", response_model=ProductListResponse)
-async def get_products(
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the request's If-None-Match header matches the ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+@router.get("", response_model=None, responses={status.HTTP_200_OK: {"model": ProductListResponse}})
+def get_products(
+    request: Request,
     page: int = 1,
     limit: int = 100,
     category: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     db: DatabaseService = Depends(get_database_service)
 ):
-    """Get products with optional filtering and pagination."""
-    result = db.get_products(page=page, limit=limit, category=category, search=search)
-    return result
+    """
+    Get products with optional filtering and pagination.
+    Pass the previous response's next_cursor as cursor to page without OFFSET.
+    """
+    # The ETag comes from the catalog version, which every product write bumps,
+    # so revalidation is answered before touching the cache or the database.
+    # The TTL epoch rotates it so other workers' writes are picked up as well.
+    epoch = int(time.time() // product_cache.ttl)
+    etag = _make_etag(product_cache.version, epoch, page, limit, category, search, cursor)
+    headers = {"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        result = product_cache.get_or_load(
+            ("list", page, limit, category, search, cursor),
+            lambda: db.get_products(
+                page=page, limit=limit, category=category, search=search, cursor=cursor
+            ),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return JSONResponse(content=result, headers=headers)
 
 
-@router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
+@router.get("/{product_id}", response_model=None, responses={status.HTTP_200_OK: {"model": ProductResponse}})
+def get_product(
     product_id: int,
+    request: Request,
     db: DatabaseService = Depends(get_database_service)
 ):
     """Get a single product by ID."""
-    product = db.get_product(product_id)
+    product = product_cache.get_or_load(("item", product_id), lambda: db.get_product(product_id))
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    return product
+    
+    etag = _make_etag(product["id"], product["updated_at"])
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return JSONResponse(content=product, headers={"ETag": etag})
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-async def create_product(
+def create_product(
     product: ProductCreate,
     current_user: UserResponse = Depends(get_admin_user),
     db: DatabaseService = Depends(get_database_service)
@@ -63,15 +124,8 @@ async def create_product(
         
         created_product = db.create_product(product_data)
         
-        return ProductResponse(
-            id=created_product["id"],
-            name=created_product["name"],
-            description=created_product["description"],
-            price=created_product["price"],
-            category=created_product["category"],
-            images=created_product["images"],
-            is_available=created_product["is_available"]
-        )
+        product_cache.invalidate()
+        return created_product
         
     except Exception as e:
         raise HTTPException(
@@ -81,7 +135,7 @@ async def create_product(
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
-async def update_product(
+def update_product(
     product_id: int,
     product: ProductCreate,
     current_user: UserResponse = Depends(get_admin_user),
@@ -99,15 +153,8 @@ async def update_product(
         
         updated_product = db.update_product(product_id, product_data)
         
-        return ProductResponse(
-            id=updated_product["id"],
-            name=updated_product["name"],
-            description=updated_product["description"],
-            price=updated_product["price"],
-            category=updated_product["category"],
-            images=updated_product["images"],
-            is_available=updated_product["is_available"]
-        )
+        product_cache.invalidate()
+        return updated_product
         
     except ValueError as e:
         raise HTTPException(
@@ -122,7 +169,7 @@ async def update_product(
 
 
 @router.delete("/{product_id}", response_model=ProductResponse)
-async def delete_product(
+def delete_product(
     product_id: int,
     current_user: UserResponse = Depends(get_admin_user),
     db: DatabaseService = Depends(get_database_service)
@@ -131,15 +178,8 @@ async def delete_product(
     try:
         deleted_product = db.delete_product(product_id)
         
-        return ProductResponse(
-            id=deleted_product["id"],
-            name=deleted_product["name"],
-            description=deleted_product["description"],
-            price=deleted_product["price"],
-            category=deleted_product["category"],
-            images=deleted_product["images"],
-            is_available=deleted_product["is_available"]
-        )
+        product_cache.invalidate()
+        return deleted_product
         
     except ValueError as e:
         raise HTTPException(
@@ -1,16 +1,46 @@
 """
 Uploads router - handles file uploads for product images
 """
+import asyncio
+import os
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
+from typing import List, Optional
 
-from ..storage import storage_service
+from ..storage import storage_service, file_extension, MAGIC_HEADER_SIZE
 from ..dependencies import get_admin_user
 from ..schemas import ImageUploadResponse, UserResponse
 
 router = APIRouter(prefix="/upload", tags=["Uploads"])
 
 
+def _spooled_size(file: UploadFile) -> int:
+    """Measure an upload whose size the multipart parser did not record"""
+    size = file.file.seek(0, os.SEEK_END)
+    file.file.seek(0)
+    return size
+
+
+async def _check_upload(file: UploadFile, file_ext: str) -> Optional[str]:
+    """Validate one uploaded image without reading its body, returning an error or None"""
+    try:
+        # Only the magic bytes are read up front; the body is streamed to disk later
+        header = await file.read(MAGIC_HEADER_SIZE)
+        await file.seek(0)
+        
+        # Validate file
+        is_valid, error_msg = storage_service.validate_image_file(
+            file.filename or "unknown",
+            file.size if file.size is not None else _spooled_size(file),
+            header,
+            file_ext
+        )
+        
+        return None if is_valid else f"{file.filename}: {error_msg}"
+        
+    except Exception as e:
+        return f"{file.filename}: Upload failed - {str(e)}"
+
+
 @router.post("/product-images", response_model=ImageUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_product_images(
     files: List[UploadFile] = File(...),
@@ -26,30 +56,23 @@ async def upload_product_images(
             detail="No files provided"
         )
     
-    uploaded_paths: List[str] = []
-    errors: List[str] = []
+    # The extension is parsed once and shared by validation and naming
+    file_exts = [file_extension(file.filename or "") for file in files]
     
-    for file in files:
+    # Files are independent, so read their headers and validate them concurrently
+    checks = await asyncio.gather(*(_check_upload(file, ext) for file, ext in zip(files, file_exts)))
+    errors: List[str] = [error for error in checks if error]
+    valid = [(file, ext) for file, ext, error in zip(files, file_exts, checks) if not error]
+    
+    # Save every valid file in one worker-thread call that opens the folder once
+    uploaded_paths: List[str] = []
+    if valid:
         try:
-            # Read file content
-            content = await file.read()
-            
-            # Validate file
-            is_valid, error_msg = storage_service.validate_image_file(
-                file.filename or "unknown",
-                len(content)
+            uploaded_paths = await storage_service.save_images_batch_async(
+                [(file.file, ext) for file, ext in valid], "products"
             )
-            
-            if not is_valid:
-                errors.append(f"{file.filename}: {error_msg}")
-                continue
-            
-            # Save file
-            url_path = storage_service.save_image(content, file.filename or "image.jpg", "products")
-            uploaded_paths.append(url_path)
-            
         except Exception as e:
-            errors.append(f"{file.filename}: Upload failed - {str(e)}")
+            errors.extend(f"{file.filename}: Upload failed - {str(e)}" for file, _ in valid)
     
     if errors and not uploaded_paths:
         # All uploads failed
@@ -2,7 +2,7 @@
 Users router - handles admin user management operations
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from ..database import DatabaseService
 from ..dependencies import get_database_service, get_admin_user
@@ -12,16 +12,22 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
 @router.get("/users", response_model=Dict[str, Any])
-async def get_all_users(
+def get_all_users(
     page: int = 1,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: UserResponse = Depends(get_admin_user),
     db: DatabaseService = Depends(get_database_service)
 ):
-    """Get all users (admin only)."""
+    """Get all users (admin only), by page or by the next_cursor of a previous response."""
     try:
-        users = db.get_all_users(page=page, limit=limit)
+        users = db.get_all_users(page=page, limit=limit, cursor=cursor)
         return users
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -30,7 +36,7 @@ async def get_all_users(
 
 
 @router.put("/users/{user_id}/admin-status", response_model=UserResponse)
-async def update_user_admin_status(
+def update_user_admin_status(
     user_id: int,
     admin_status: AdminStatusUpdate,
     current_user: UserResponse = Depends(get_admin_user),
@@ -47,13 +53,7 @@ async def update_user_admin_status(
         
         updated_user = db.update_user_admin_status(user_id, admin_status.is_admin)
         
-        return UserResponse(
-            id=updated_user["id"],
-            email=updated_user["email"],
-            first_name=updated_user["first_name"],
-            last_name=updated_user["last_name"],
-            is_admin=updated_user["is_admin"]
-        )
+        return updated_user
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
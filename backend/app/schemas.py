@@ -1,30 +1,85 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
-from typing import List, Optional
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    WithJsonSchema,
+    field_validator,
+    validate_email,
+)
+from typing import Annotated, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+
+from .models import OrderStatus
+
+
+# Request bodies are never mutated by the routes and unknown keys are a client
+# error, so they get an immutable, strict config that pydantic-core can compile
+# into a tighter validator.
+_REQUEST_MODEL_CONFIG = ConfigDict(extra="forbid", frozen=True)
+
+# Response models are built from trusted service-layer data. Interning repeated
+# dict keys helps list payloads, and already-built instances are never revalidated.
+_RESPONSE_MODEL_CONFIG = ConfigDict(
+    from_attributes=True,
+    cache_strings="keys",
+    revalidate_instances="never",
+)
+
+# Syntax-only email check; full validation already happened at registration
+_EMAIL_RE = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+
+@lru_cache(maxsize=4096)
+def _normalize_email(value: str) -> str:
+    """Run the full email-validator check, memoized so repeated addresses skip IDNA work"""
+    return validate_email(value)[1]
+
+
+# Same behaviour as EmailStr, backed by the memoized validator
+EmailAddress = Annotated[
+    str,
+    AfterValidator(_normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
+# Regex-only check, run in pydantic-core, for every path except account creation
+SimpleEmail = Annotated[
+    str,
+    StringConstraints(pattern=_EMAIL_RE, max_length=254),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
 
 
 # ============== User Schemas ==============
 
 class UserBase(BaseModel):
     """Base user schema with common fields"""
-    email: EmailStr
+    email: SimpleEmail
     first_name: str = Field(..., min_length=1, max_length=100)
     last_name: str = Field(..., min_length=1, max_length=100)
 
 
 class UserCreate(UserBase):
     """Schema for user registration"""
+    # New addresses get the full email-validator check
+    email: EmailAddress
     password: str = Field(..., min_length=6, max_length=100)
 
+    model_config = _REQUEST_MODEL_CONFIG
+
 
 class UserLogin(BaseModel):
     """Schema for user login"""
-    email: EmailStr
+    email: SimpleEmail
     password: str
 
+    model_config = _REQUEST_MODEL_CONFIG
+
 
 class UserResponse(UserBase):
     """Schema for user response (excludes password)"""
@@ -33,7 +88,7 @@ class UserResponse(UserBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = _RESPONSE_MODEL_CONFIG
 
 
 class TokenResponse(BaseModel):
@@ -46,6 +101,8 @@ class TokenRefresh(BaseModel):
     """Schema for token refresh request"""
     refresh_token: str
 
+    model_config = _REQUEST_MODEL_CONFIG
+
 
 # ============== Product Schemas ==============
 
@@ -55,12 +112,13 @@ class ProductBase(BaseModel):
     description: str = Field(..., min_length=1)
     price: float = Field(..., gt=0)
     category: str = Field(..., min_length=1, max_length=100)
-    images: List[str] = Field(default_factory=list)
+    # Tuples are kept as-is by pydantic-core instead of being copied into a new list
+    images: Tuple[str, ...] = Field(default_factory=tuple)
 
 
 class ProductCreate(ProductBase):
     """Schema for creating a product"""
-    pass
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class ProductUpdate(BaseModel):
@@ -69,7 +127,9 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = Field(None, min_length=1)
     price: Optional[float] = Field(None, gt=0)
     category: Optional[str] = Field(None, min_length=1, max_length=100)
-    images: Optional[List[str]] = None
+    images: Optional[Tuple[str, ...]] = None
+
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class ProductResponse(ProductBase):
@@ -79,7 +139,7 @@ class ProductResponse(ProductBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(**_RESPONSE_MODEL_CONFIG, frozen=True)
 
 
 class ProductListResponse(BaseModel):
@@ -88,6 +148,9 @@ class ProductListResponse(BaseModel):
     total: int
     page: int
     limit: int
+    next_cursor: Optional[str] = None
+
+    model_config = _RESPONSE_MODEL_CONFIG
 
 
 # ============== Order Schemas ==============
@@ -106,6 +169,8 @@ class OrderItemCreate(BaseModel):
     product_id: int
     quantity: int = Field(..., gt=0)
 
+    model_config = _REQUEST_MODEL_CONFIG
+
     @field_validator('quantity')
     @classmethod
     def validate_quantity(cls, v: int) -> int:
@@ -119,6 +184,8 @@ class OrderCreate(BaseModel):
     items: List[OrderItemCreate] = Field(..., min_length=1)
     shipping_address: ShippingAddress
 
+    model_config = _REQUEST_MODEL_CONFIG
+
 
 class OrderItemResponse(BaseModel):
     """Schema for order item response"""
@@ -140,12 +207,14 @@ class OrderResponse(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = _RESPONSE_MODEL_CONFIG
 
 
 class OrderStatusUpdate(BaseModel):
     """Schema for updating order status"""
-    status: str = Field(..., pattern="^(PENDING|CONFIRMED|SHIPPED|DELIVERED|CANCELLED)$")
+    status: OrderStatus
+
+    model_config = _REQUEST_MODEL_CONFIG
 
 
 class OrderStatusResponse(BaseModel):
@@ -189,6 +258,8 @@ class AdminStatusUpdate(BaseModel):
     """Schema for updating user admin status"""
     is_admin: bool
 
+    model_config = _REQUEST_MODEL_CONFIG
+
 
 class UserListResponse(BaseModel):
     """Schema for paginated user list"""
@@ -196,4 +267,7 @@ class UserListResponse(BaseModel):
     total: int
     page: int
     limit: int
+    next_cursor: Optional[str] = None
+
+    model_config = _RESPONSE_MODEL_CONFIG
 
@@ -2,25 +2,192 @@
 Storage module for handling file uploads and management.
 Supports local storage with future cloud migration capability.
 """
+import io
+import mmap
 import os
-import uuid
-from datetime import datetime
-from typing import List, Optional
+import threading
+import time
+from typing import BinaryIO, Dict, FrozenSet, List, Optional, Tuple
 from pathlib import Path
-import shutil
+import anyio
 from .config import get_upload_dir, get_max_file_size, get_allowed_file_types
 
+# Stored filenames are "<16 hex digit ns timestamp>_<8 random hex chars><ext>",
+# which sort lexicographically in upload order
+_time_ns = time.time_ns
+
+
+# Per-thread buffer of random hex digits, refilled from os.urandom in 4KB reads.
+# A plain threading.local instance rather than a subclass, so mypyc can compile the module
+_hex_local = threading.local()
+
+
+def _take_hex(n: int) -> str:
+    """Take n random hex digits from this thread's buffer"""
+    buf: str = getattr(_hex_local, "buf", "")
+    if len(buf) < n:
+        buf = os.urandom(4096).hex()
+    _hex_local.buf = buf[n:]
+    return buf[:n]
+
+# Opening files relative to a directory descriptor saves a path lookup per file
+_SUPPORTS_DIR_FD: bool = hasattr(os, "O_DIRECTORY") and os.open in os.supports_dir_fd
+
+# Files at least this large are dropped from the page cache once written,
+# since freshly uploaded images are served later, if at all
+_FADVISE_THRESHOLD = 1 << 20
+_HAS_FADVISE: bool = hasattr(os, "posix_fadvise")
+
+
+# Chunk size used when streaming uploads to disk
+COPY_BUFFER_SIZE = 1 << 20
+
+# New files are created exclusively, so a name collision fails instead of overwriting
+_NEW_FILE_FLAGS: int = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+
+
+def _write_unbuffered(fd: int, data: bytes) -> None:
+    """Write data to an unbuffered fd, without copying it through a BufferedWriter"""
+    view: memoryview = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_stream(fd: int, source: BinaryIO) -> None:
+    """Copy a file object to an unbuffered fd COPY_BUFFER_SIZE bytes at a time"""
+    written: int = 0
+    while True:
+        chunk = source.read(COPY_BUFFER_SIZE)
+        if not chunk:
+            break
+        _write_unbuffered(fd, chunk)
+        written += len(chunk)
+    if _HAS_FADVISE and written >= _FADVISE_THRESHOLD:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+def _copy_fd(src_fd: int, dst_fd: int, size: int) -> None:
+    """Copy size bytes between fds inside the kernel, falling back to a userspace copy"""
+    remaining: int = size
+    if hasattr(os, "copy_file_range"):
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError:
+            pass  # e.g. cross-filesystem on older kernels; continue with sendfile
+    if remaining > 0 and hasattr(os, "sendfile"):
+        try:
+            offset = size - remaining
+            while remaining > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+                if sent == 0:
+                    break
+                offset += sent
+                remaining -= sent
+        except OSError:
+            pass
+    if remaining > 0:
+        os.lseek(src_fd, size - remaining, os.SEEK_SET)
+        os.lseek(dst_fd, size - remaining, os.SEEK_SET)
+        while remaining > 0:
+            chunk = os.read(src_fd, min(remaining, COPY_BUFFER_SIZE))
+            if not chunk:
+                break
+            _write_unbuffered(dst_fd, chunk)
+            remaining -= len(chunk)
+
+
+# Upper bound on worker threads doing image writes at once, separate from the
+# default threadpool so a burst of uploads cannot starve sync route handlers
+UPLOAD_THREAD_LIMIT = 32
+_upload_limiter = anyio.CapacityLimiter(UPLOAD_THREAD_LIMIT)
+
+# Number of leading bytes needed to identify every supported image format
+MAGIC_HEADER_SIZE = 12
+
+# Image format expected for each extension
+_EXTENSION_FORMATS: Dict[str, str] = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".webp": "webp",
+    ".avif": "avif",
+}
+
+
+def file_extension(filename: str) -> str:
+    """Lowercased extension including the dot (e.g. ".jpg"), or "" if there is none"""
+    i: int = filename.rfind(".")
+    return filename[i:].lower() if i >= 0 else ""
+
+
+def _sniff_image_format(header: bytes) -> Optional[str]:
+    """Identify an image format from the first MAGIC_HEADER_SIZE bytes of a file"""
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header[4:12] in (b"ftypavif", b"ftypavis"):
+        return "avif"
+    return None
+
 
 class StorageService:
     """Storage service for handling file operations"""
     
-    def __init__(self, base_path: Optional[str] = None):
-        self.base_path = Path(base_path or get_upload_dir())
-        self.products_path = self.base_path / "products"
+    def __init__(self, base_path: Optional[str] = None) -> None:
+        self.base_path: Path = Path(base_path or get_upload_dir())
+        self.products_path: Path = self.base_path / "products"
+        
+        # Validation limits are snapshotted once instead of re-read from settings per upload
+        self._allowed_extensions: FrozenSet[str] = frozenset(get_allowed_file_types())
+        self._max_bytes: int = get_max_file_size()
+        self._err_extension: str = f"File type not allowed. Allowed types: {', '.join(sorted(self._allowed_extensions))}"
+        self._err_size: str = f"File too large. Maximum size: {self._max_bytes // (1024 * 1024)}MB"
+        
+        # String forms of the storage roots, so hot paths join strings instead of building Paths
+        self._base_str: str = str(self.base_path)
+        self._products_str: str = str(self.products_path)
+        # Symlinks resolved, for checking that URL paths stay inside the upload directory
+        self._real_base: str = os.path.realpath(self._base_str)
         
         # Ensure directories exist
         self.products_path.mkdir(parents=True, exist_ok=True)
     
+    def _folder_path(self, folder: str) -> str:
+        """Directory for a storage folder, created on first use"""
+        if folder == "products":
+            return self._products_str
+        folder_path: str = os.path.join(self._base_str, folder)
+        os.makedirs(folder_path, exist_ok=True)
+        return folder_path
+    
+    @staticmethod
+    def _unique_name(file_ext: str) -> str:
+        """Generate a unique stored filename ending in the given extension"""
+        return f"{_time_ns():016x}_{_take_hex(8)}{file_ext}"
+    
+    def _new_storage_path(self, file_ext: str, folder: str) -> tuple[str, str]:
+        """Pick a unique file path for an upload, returning (storage_path, url_path)"""
+        unique_name: str = self._unique_name(file_ext)
+        return os.path.join(self._folder_path(folder), unique_name), f"/uploads/{folder}/{unique_name}"
+    
+    def _resolve_url_path(self, url_path: str) -> Optional[str]:
+        """
+        Map an "/uploads/..." URL path to its file, or None if it is not an
+        uploads path or resolves outside the upload directory (e.g. via "..")
+        """
+        if not url_path.startswith("/uploads/"):
+            return None
+        path: str = os.path.realpath(os.path.join(self._base_str, url_path[9:]))  # Remove "/uploads/" prefix
+        if not path.startswith(self._real_base + os.sep):
+            return None
+        return path
+    
     def save_image(self, file_content: bytes, filename: str, folder: str = "products") -> str:
         """
         Save an image file and return the relative URL path.
@@ -33,23 +200,99 @@ class StorageService:
         Returns:
             Relative URL path (e.g., "/uploads/products/xyz.jpg")
         """
-        # Generate unique filename
-        file_ext = Path(filename).suffix.lower()
-        unique_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{file_ext}"
+        return self.save_images_batch([(io.BytesIO(file_content), file_extension(filename))], folder)[0]
+    
+    def save_images_batch(self, files: List[Tuple[BinaryIO, str]], folder: str = "products") -> List[str]:
+        """
+        Stream several image files to disk and return their relative URL paths, in order.
+        The folder is opened once and every file is created relative to it.
+        Only COPY_BUFFER_SIZE bytes of a file are held in memory at a time.
         
-        # Determine storage path
-        if folder == "products":
-            storage_path = self.products_path / unique_name
-        else:
-            storage_path = self.base_path / folder / unique_name
-            storage_path.parent.mkdir(parents=True, exist_ok=True)
+        Args:
+            files: (source, file_ext) pairs; each source is copied from its current
+                position and file_ext is as returned by file_extension
+            folder: Storage folder (default: "products")
+            
+        Returns:
+            Relative URL paths (e.g., ["/uploads/products/xyz.jpg"])
+        """
+        folder_path = self._folder_path(folder)
+        dir_fd: Optional[int] = os.open(folder_path, os.O_RDONLY | os.O_DIRECTORY) if _SUPPORTS_DIR_FD else None
+        url_paths: List[str] = []
+        try:
+            for source, file_ext in files:
+                unique_name = self._unique_name(file_ext)
+                if dir_fd is not None:
+                    fd = os.open(unique_name, _NEW_FILE_FLAGS, 0o666, dir_fd=dir_fd)
+                else:
+                    fd = os.open(os.path.join(folder_path, unique_name), _NEW_FILE_FLAGS, 0o666)
+                try:
+                    _write_stream(fd, source)
+                finally:
+                    os.close(fd)
+                url_paths.append(f"/uploads/{folder}/{unique_name}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
         
-        # Save file
-        with open(storage_path, 'wb') as f:
-            f.write(file_content)
+        return url_paths
+    
+    def save_image_stream(
+        self, source: BinaryIO, filename: str, folder: str = "products", file_ext: Optional[str] = None
+    ) -> str:
+        """
+        Stream an image from a file object to disk and return the relative URL path.
         
-        # Return relative URL path
-        return f"/uploads/{folder}/{unique_name}"
+        Args:
+            source: Readable binary file object, copied from its current position
+            filename: Original filename
+            folder: Storage folder (default: "products")
+            file_ext: Extension already taken from filename, if the caller has it
+            
+        Returns:
+            Relative URL path (e.g., "/uploads/products/xyz.jpg")
+        """
+        if file_ext is None:
+            file_ext = file_extension(filename)
+        return self.save_images_batch([(source, file_ext)], folder)[0]
+    
+    async def save_images_batch_async(self, files: List[Tuple[BinaryIO, str]], folder: str = "products") -> List[str]:
+        """Run save_images_batch on a worker thread so the event loop is not blocked"""
+        return await anyio.to_thread.run_sync(
+            self.save_images_batch, files, folder, limiter=_upload_limiter
+        )
+    
+    def copy_image(self, url_path: str, folder: str = "products") -> str:
+        """
+        Duplicate a stored image under a new unique name without reading it into Python.
+        
+        Args:
+            url_path: The URL path of the source (e.g., "/uploads/products/xyz.jpg")
+            folder: Storage folder for the copy (default: "products")
+            
+        Returns:
+            Relative URL path of the copy
+            
+        Raises:
+            ValueError: If url_path is not a path inside the upload directory
+            FileNotFoundError: If the source image does not exist
+        """
+        source_path = self._resolve_url_path(url_path)
+        if source_path is None:
+            raise ValueError("Invalid image path")
+        
+        src_fd = os.open(source_path, os.O_RDONLY)
+        try:
+            storage_path, new_url_path = self._new_storage_path(file_extension(url_path), folder)
+            dst_fd = os.open(storage_path, _NEW_FILE_FLAGS, 0o666)
+            try:
+                _copy_fd(src_fd, dst_fd, os.fstat(src_fd).st_size)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+        
+        return new_url_path
     
     def delete_image(self, url_path: str) -> bool:
         """
@@ -61,15 +304,14 @@ class StorageService:
         Returns:
             True if deleted successfully, False otherwise
         """
-        try:
-            # Convert URL path to file path
-            if url_path.startswith("/uploads/"):
-                file_path = self.base_path / url_path[9:]  # Remove "/uploads/" prefix
-                if file_path.exists():
-                    file_path.unlink()
-                    return True
+        path = self._resolve_url_path(url_path)
+        if path is None:
             return False
-        except Exception:
+        try:
+            # Unlink directly; a missing file shows up as an error, saving a separate exists() stat
+            os.unlink(path)
+            return True
+        except OSError:
             return False
     
     def get_file_size(self, url_path: str) -> Optional[int]:
@@ -82,38 +324,75 @@ class StorageService:
         Returns:
             File size in bytes or None if not found
         """
+        path = self._resolve_url_path(url_path)
+        if path is None:
+            return None
         try:
-            if url_path.startswith("/uploads/"):
-                file_path = self.base_path / url_path[9:]
-                if file_path.exists():
-                    return file_path.stat().st_size
-        except Exception:
-            pass
-        return None
+            # A single stat both checks existence and returns the size
+            return os.stat(path).st_size
+        except OSError:
+            return None
+    
+    def open_image_readonly(self, url_path: str) -> Optional[mmap.mmap]:
+        """
+        Map a stored image read-only so it can be hashed or decoded without
+        copying it into a bytes object. Pages are faulted in on demand.
+        
+        Args:
+            url_path: The URL path (e.g., "/uploads/products/xyz.jpg")
+            
+        Returns:
+            A read-only mmap (close it when done), or None if the path is outside
+            the upload directory or the file is missing or empty
+        """
+        path = self._resolve_url_path(url_path)
+        if path is None:
+            return None
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            # The mapping keeps its own reference to the file, so the fd can be closed
+            return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return None
+        finally:
+            os.close(fd)
     
-    def validate_image_file(self, filename: str, file_size: int) -> tuple[bool, str]:
+    def validate_image_file(
+        self, filename: str, file_size: int, header: Optional[bytes] = None, file_ext: Optional[str] = None
+    ) -> tuple[bool, str]:
         """
         Validate image file before saving.
         
         Args:
             filename: Original filename
             file_size: File size in bytes
+            header: Optional leading bytes of the file, used to check that the
+                content really is the image format its extension claims
+            file_ext: Extension already taken from filename, if the caller has it
             
         Returns:
             (is_valid, error_message)
         """
-        # Check file extension
-        allowed_extensions = get_allowed_file_types()
-        file_ext = Path(filename).suffix.lower()
+        if file_ext is None:
+            file_ext = file_extension(filename)
         
-        if file_ext not in allowed_extensions:
-            return False, f"File type not allowed. Allowed types: {', '.join(allowed_extensions)}"
+        # Check extension and size together; the error messages are prebuilt in __init__
+        extension_ok: bool = file_ext in self._allowed_extensions
+        if not (extension_ok and file_size <= self._max_bytes):
+            return False, self._err_size if extension_ok else self._err_extension
         
-        # Check file size
-        max_size_bytes = get_max_file_size()
-        if file_size > max_size_bytes:
-            max_size_mb = max_size_bytes // (1024 * 1024)
-            return False, f"File too large. Maximum size: {max_size_mb}MB"
+        # Check file content. An allowed extension with no known signature fails
+        # closed, since there is nothing to check its content against.
+        if header is not None:
+            expected_format = _EXTENSION_FORMATS.get(file_ext)
+            if expected_format is None:
+                return False, "File content cannot be verified for this file type"
+            if _sniff_image_format(header[:MAGIC_HEADER_SIZE]) != expected_format:
+                return False, "File content does not match its extension"
         
         return True, ""
 
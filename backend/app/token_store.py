@@ -0,0 +1,81 @@
+"""
+Revocation store for JWT access tokens.
+Revoked token IDs (jti) are kept only until the token would have expired anyway.
+"""
+import hashlib
+import threading
+import time
+from typing import Dict
+
+from .config import get_redis_url
+
+
+def _hash_jti(jti: str) -> str:
+    """Hash a token ID so the raw jti is never stored"""
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+class MemoryRevocationStore:
+    """Process-local revocation set, used when no Redis URL is configured"""
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Mark a token ID as revoked until its expiry timestamp"""
+        now = time.time()
+        with self._lock:
+            # Sweep entries whose tokens have expired, including ones never presented again
+            expired = [key for key, key_expires_at in self._revoked.items() if key_expires_at <= now]
+            for key in expired:
+                del self._revoked[key]
+            self._revoked[_hash_jti(jti)] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token ID has been revoked"""
+        key = _hash_jti(jti)
+        expires_at = self._revoked.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            with self._lock:
+                self._revoked.pop(key, None)
+            return False
+        return True
+
+
+class RedisRevocationStore:
+    """Revocation set shared across workers through Redis keys with a TTL"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "REDIS_URL is set but the redis package is not installed; "
+                "install redis or unset REDIS_URL"
+            ) from e
+
+        self._client = redis.Redis.from_url(url)
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Mark a token ID as revoked until its expiry timestamp"""
+        ttl = int(expires_at - time.time())
+        if ttl > 0:
+            self._client.set(f"bl:{_hash_jti(jti)}", 1, ex=ttl)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token ID has been revoked"""
+        return bool(self._client.exists(f"bl:{_hash_jti(jti)}"))
+
+
+def _create_revocation_store():
+    redis_url = get_redis_url()
+    if redis_url:
+        return RedisRevocationStore(redis_url)
+    return MemoryRevocationStore()
+
+
+# Global revocation store instance
+revocation_store = _create_revocation_store()
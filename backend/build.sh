@@ -5,4 +5,11 @@
 echo "Installing Python dependencies..."
 pip install -r requirements.txt
 
+# Optionally compile the upload storage hot path to a C extension with mypyc.
+# The .so is imported in place of app/storage.py; delete it to fall back.
+if [ "${COMPILE_STORAGE:-0}" = "1" ]; then
+    echo "Compiling app/storage.py with mypyc..."
+    pip install "mypy>=1.18" && mypyc app/storage.py
+fi
+
 echo "Build complete!"
@@ -2,7 +2,9 @@
 Seed script to add sample products to the database
 Run this with: poetry run python seed_products.py (from backend directory)
 """
+from app.config import get_debug_mode
 from app.database import DatabaseService
+from app.schemas import ProductCreate
 
 def seed_products():
     db = DatabaseService()
@@ -58,12 +60,19 @@ def seed_products():
         },
     ]
     
+    if get_debug_mode():
+        # The rows are trusted and go straight to a bulk insert; only check them
+        # against the API schema in debug runs (is_available is not part of it)
+        for product_data in products:
+            ProductCreate.model_validate({k: v for k, v in product_data.items() if k != "is_available"})
+    
     print("Adding sample products...")
+    # One bulk INSERT instead of a round trip per product
+    count = db.create_products_bulk(products)
     for product_data in products:
-        product = db.create_product(product_data)
-        print(f"[OK] Added: {product['name']}")
+        print(f"[OK] Added: {product_data['name']}")
     
-    print(f"\n[SUCCESS] Successfully added {len(products)} products!")
+    print(f"\n[SUCCESS] Successfully added {count} products!")
 
 if __name__ == "__main__":
     seed_products()
@@ -23,19 +23,19 @@ try:
     engine = create_engine(database_url)
     
     with engine.connect() as connection:
-        # Test query
-        result = connection.execute(text("SELECT version();"))
-        version = result.fetchone()[0]
+        # Server version and table list in a single round trip
+        result = connection.execute(text("""
+            SELECT version() AS version,
+                   ARRAY(
+                       SELECT table_name::text
+                       FROM information_schema.tables
+                       WHERE table_schema = 'public'
+                   ) AS tables;
+        """))
+        version, tables = result.one()
         print("SUCCESS: Connection successful!")
         print(f"PostgreSQL version: {version}")
         
-        # Check if we can list tables
-        result = connection.execute(text("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public';
-        """))
-        tables = [row[0] for row in result.fetchall()]
         
         if tables:
             print(f"Existing tables: {', '.join(tables)}")
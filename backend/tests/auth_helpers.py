@@ -3,6 +3,7 @@ Authentication helper functions for tests
 """
 from fastapi.testclient import TestClient
 from typing import Dict, Any, Optional
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.models import User
 
@@ -13,7 +14,8 @@ class AuthTestHelper:
     def __init__(self, client: TestClient, test_db: Optional[Session] = None):
         self.client = client
         self.test_db = test_db
-        self._auth_tokens: Dict[str, str] = {}
+        # Authorization header dict per email, built once at login and reused
+        self._auth_headers: Dict[str, Dict[str, str]] = {}
     
     def register_user(self, email: str = "test@example.com", password: str = "testpass123", 
                      first_name: str = "Test", last_name: str = "User") -> Dict[str, Any]:
@@ -38,17 +40,17 @@ class AuthTestHelper:
         assert response.status_code == 200, f"Login failed: {response.text}"
         data = response.json()
         token = data["access_token"]
-        self._auth_tokens[email] = token
+        self._auth_headers[email] = {"Authorization": f"Bearer {token}"}
         return token
     
     def get_auth_headers(self, email: str = "test@example.com") -> Dict[str, str]:
         """Get authorization headers for a user"""
-        if email not in self._auth_tokens:
+        headers = self._auth_headers.get(email)
+        if headers is None:
             # Auto-login if token not available
             self.login_user(email)
-        
-        token = self._auth_tokens[email]
-        return {"Authorization": f"Bearer {token}"}
+            headers = self._auth_headers[email]
+        return headers
     
     def create_authenticated_user(self, email: str = "test@example.com", 
                                  password: str = "testpass123",
@@ -66,12 +68,10 @@ class AuthTestHelper:
         """Create an admin user, login, and return (user_data, token)"""
         user_data = self.register_user(email, password, first_name, last_name)
         
-        # Set is_admin to True in the database
+        # Set is_admin to True in the database with a single UPDATE
         if self.test_db:
-            user = self.test_db.query(User).filter(User.email == email).first()
-            if user:
-                user.is_admin = True
-                self.test_db.commit()
+            self.test_db.execute(update(User).where(User.email == email).values(is_admin=True))
+            self.test_db.commit()
         
         # Login AFTER setting admin status to get fresh token
         token = self.login_user(email, password)
@@ -82,11 +82,7 @@ class AuthTestHelper:
                                   json: Optional[Dict[str, Any]] = None,
                                   **kwargs) -> Any:
         """Make an authenticated request"""
-        headers = self.get_auth_headers(email)
-        if json:
-            return self.client.request(method, url, json=json, headers=headers, **kwargs)
-        else:
-            return self.client.request(method, url, headers=headers, **kwargs)
+        return self.client.request(method, url, json=json, headers=self.get_auth_headers(email), **kwargs)
     
     def test_auth_required(self, method: str, url: str, json: Optional[Dict[str, Any]] = None):
         """Test that an endpoint requires authentication"""
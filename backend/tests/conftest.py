@@ -1,34 +1,270 @@
 """
 Test configuration for SQLAlchemy tests
 """
+import os
 import pytest
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from datetime import timedelta
+from sqlalchemy import create_engine, delete, event, insert
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from app import auth
 from app.main import app
+from app.cache import product_cache
+from app.database_config import get_db
 from app.dependencies import get_database_service
-from app.models import Base
+from app.models import Base, Order, OrderItem, Product, User
 from app.database import DatabaseService
+from app.routers import uploads
+from app.storage import StorageService
 
 # Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# StaticPool hands every session the same connection, so they all see one database.
+# Each pytest-xdist worker is its own process and so gets its own in-memory
+# database; run the suite in parallel with `pytest -n auto`.
+# Set TEST_DB_URL to run the same suite against another database, e.g. Postgres.
+SQLALCHEMY_DATABASE_URL = os.getenv("TEST_DB_URL", "sqlite:///:memory:")
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+else:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-@pytest.fixture(scope="function")
-def test_db():
-    """Create a fresh database for each test"""
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+if engine.dialect.name == "sqlite":
+    # pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN instead
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
     
-    # Create a test session
-    session = TestingSessionLocal()
+    # Test data is throwaway, so skip journaling and fsync work on commit
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hashing():
+    """Hash test passwords with a single PBKDF2 round instead of the production cost"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(auth, "pwd_context", CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__rounds=1))
+        yield
+
+# Tables in dependency order, resolved once at import
+TABLES = Base.metadata.sorted_tables
+
+@pytest.fixture(scope="session")
+def db_schema():
+    """Create the tables once for the whole test run"""
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    yield
+    Base.metadata.drop_all(bind=engine, tables=TABLES)
+
+@pytest.fixture(scope="function")
+def test_db(db_schema):
+    """Give each test a session inside a transaction that is rolled back afterwards"""
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Commits in the code under test only release a SAVEPOINT inside the outer transaction
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
     
     yield session
     
     # Clean up
     session.close()
-    Base.metadata.drop_all(bind=engine)
+    transaction.rollback()
+    connection.close()
+
+# Catalog shared by the order tests, keyed by a short name
+SEED_PRODUCTS = {
+    "dress": {
+        "name": "Vintage Chanel Dress",
+        "description": "Beautiful vintage Chanel dress",
+        "price": 1500.00,
+        "category": "dresses",
+        "images": ["image1.jpg"],
+        "is_available": True
+    },
+    "bag": {
+        "name": "Vintage Hermes Bag",
+        "description": "Classic Hermes handbag",
+        "price": 2500.00,
+        "category": "bags",
+        "images": ["image2.jpg"],
+        "is_available": True
+    },
+    "test": {
+        "name": "Test Product",
+        "description": "Test product for order",
+        "price": 100.00,
+        "category": "test",
+        "images": ["test.jpg"],
+        "is_available": True
+    },
+    "test2": {
+        "name": "Test Product 2",
+        "description": "Test product for order 2",
+        "price": 200.00,
+        "category": "test",
+        "images": ["test2.jpg"],
+        "is_available": True
+    },
+}
+
+@pytest.fixture(scope="function")
+def seeded_products(test_db):
+    """Insert SEED_PRODUCTS in one statement and return {key: product id}"""
+    keys = list(SEED_PRODUCTS)
+    result = test_db.execute(
+        insert(Product).returning(Product.id, sort_by_parameter_order=True),
+        [SEED_PRODUCTS[key] for key in keys]
+    )
+    product_ids = result.scalars().all()
+    test_db.commit()
+    return dict(zip(keys, product_ids))
+
+@pytest.fixture(scope="module")
+def sample_product_payload():
+    """A valid product create/update body, built once per module; don't mutate it"""
+    return {
+        "name": "Vintage Chanel Dress",
+        "description": "Beautiful vintage Chanel dress",
+        "price": 1500.00,
+        "category": "dresses",
+        "images": ["image1.jpg", "image2.jpg"]
+    }
+
+# Catalog for the read-only listing tests: two "test" products, one dress, one bag
+LISTING_CATALOG = [
+    {"name": "Test Product 1", "description": "Test Description 1", "price": 100.00, "category": "test", "is_available": True},
+    {"name": "Test Product 2", "description": "Test Description 2", "price": 200.00, "category": "test", "is_available": True},
+    {"name": "Vintage Dress", "description": "Beautiful vintage dress", "price": 100.00, "category": "dresses", "is_available": True},
+    {"name": "Modern Bag", "description": "Modern handbag", "price": 200.00, "category": "bags", "is_available": True},
+]
+
+@pytest.fixture(scope="class")
+def listing_catalog(db_schema):
+    """
+    Commit LISTING_CATALOG once for a test class and delete it afterwards.
+    Only for classes whose tests never write products: the rows live outside
+    the per-test transactions, so every test in the class sees them.
+    """
+    with engine.begin() as connection:
+        product_ids = connection.execute(
+            insert(Product).returning(Product.id, sort_by_parameter_order=True), LISTING_CATALOG
+        ).scalars().all()
+    yield product_ids
+    with engine.begin() as connection:
+        connection.execute(delete(Product).where(Product.id.in_(product_ids)))
+
+# Identity behind default_token. The fixed id lets one token, minted once per
+# run, match the row that seeded_user re-inserts inside each test's transaction.
+# The password is not a valid hash, so this user cannot log in through the API.
+DEFAULT_USER = {
+    "id": 1_000_000,
+    "email": "default@example.com",
+    "password": "!",
+    "first_name": "Default",
+    "last_name": "User",
+    "is_admin": False
+}
+
+@pytest.fixture(scope="session")
+def default_token():
+    """A JWT for DEFAULT_USER, minted once instead of logging in through /auth/login"""
+    return auth.AuthService.create_access_token(
+        data={"sub": str(DEFAULT_USER["id"])}, expires_delta=timedelta(hours=12)
+    )
+
+@pytest.fixture(scope="function")
+def seeded_user(test_db):
+    """Insert DEFAULT_USER directly and return it"""
+    test_db.execute(insert(User), DEFAULT_USER)
+    test_db.commit()
+    return DEFAULT_USER
+
+@pytest.fixture(scope="function")
+def default_headers(seeded_user, default_token):
+    """
+    Authorization headers for tests where the caller's identity does not matter.
+    Don't log out with these: the token is shared by the whole run.
+    """
+    return {"Authorization": f"Bearer {default_token}"}
+
+# Admin counterpart of DEFAULT_USER, behind admin_token
+DEFAULT_ADMIN = {
+    **DEFAULT_USER,
+    "id": 2_000_000,
+    "email": "default-admin@example.com",
+    "last_name": "Admin",
+    "is_admin": True
+}
+
+@pytest.fixture(scope="session")
+def admin_token():
+    """A JWT for DEFAULT_ADMIN, minted once instead of logging in through /auth/login"""
+    return auth.AuthService.create_access_token(
+        data={"sub": str(DEFAULT_ADMIN["id"])}, expires_delta=timedelta(hours=12)
+    )
+
+@pytest.fixture(scope="function")
+def admin_headers(test_db, admin_token):
+    """
+    Insert DEFAULT_ADMIN directly and return Authorization headers for it.
+    Don't log out with these: the token is shared by the whole run.
+    """
+    test_db.execute(insert(User), DEFAULT_ADMIN)
+    test_db.commit()
+    return {"Authorization": f"Bearer {admin_token}"}
+
+# Shipping address used for orders inserted directly by make_order
+SEED_SHIPPING_ADDRESS = {
+    "street": "123 Main St",
+    "city": "New York",
+    "state": "NY",
+    "zip_code": "10001",
+    "country": "USA"
+}
+
+@pytest.fixture(scope="function")
+def make_order(test_db, seeded_products):
+    """
+    Return a callable that inserts a PENDING order for a user straight into the
+    database, bypassing POST /orders, and returns its id. items is a list of
+    (SEED_PRODUCTS key, quantity) pairs.
+    """
+    def _make_order(user_id, items=(("test", 1),)):
+        total = sum(SEED_PRODUCTS[key]["price"] * quantity for key, quantity in items)
+        order_id = test_db.execute(
+            insert(Order).returning(Order.id),
+            {"user_id": user_id, "total_amount": total, "shipping_address": SEED_SHIPPING_ADDRESS}
+        ).scalar_one()
+        test_db.execute(insert(OrderItem), [
+            {
+                "order_id": order_id,
+                "product_id": seeded_products[key],
+                "quantity": quantity,
+                "price": SEED_PRODUCTS[key]["price"],
+                "product_name": SEED_PRODUCTS[key]["name"]
+            }
+            for key, quantity in items
+        ])
+        test_db.commit()
+        return order_id
+    
+    return _make_order
 
 @pytest.fixture(scope="function")
 def test_db_service(test_db):
@@ -40,12 +276,21 @@ def test_db_service(test_db):
     
     return TestDatabaseService()
 
+@pytest.fixture(scope="session")
+def session_client():
+    """One TestClient (and app lifespan) shared by the whole test run"""
+    with TestClient(app) as test_client:
+        yield test_client
+
 @pytest.fixture(scope="function")
-def client(test_db, test_db_service):
-    """Create a test client with overridden database dependency"""
-    # Override the database dependency
+def client(session_client, test_db, test_db_service):
+    """Return the shared test client with the database dependency overridden for this test"""
+    # Override the database dependencies; both hand out the same test session
     app.dependency_overrides[get_database_service] = lambda: test_db_service
-    yield TestClient(app)
+    app.dependency_overrides[get_db] = lambda: test_db
+    # Each test starts from an empty database, so cached catalog reads are stale
+    product_cache.invalidate()
+    yield session_client
     # Clear overrides after test
     app.dependency_overrides.clear()
 
@@ -53,4 +298,36 @@ def client(test_db, test_db_service):
 def auth_helper(client, test_db):
     """Create an authentication helper for tests"""
     from tests.auth_helpers import AuthTestHelper
-    return AuthTestHelper(client, test_db)
\ No newline at end of file
+    return AuthTestHelper(client, test_db)
+
+class StatementLog(list):
+    """SQL statements collected by sql_counter, in execution order"""
+    
+    def selects(self):
+        """Only the SELECT statements"""
+        return [s for s in self if s.lstrip().upper().startswith("SELECT")]
+
+@pytest.fixture(scope="function")
+def sql_counter():
+    """Collect the SQL statements executed against the test database"""
+    @contextmanager
+    def count_statements():
+        statements = StatementLog()
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    
+    return count_statements
+
+@pytest.fixture(scope="function")
+def upload_storage(tmp_path, monkeypatch):
+    """Point the upload routes at a StorageService rooted in a temporary directory"""
+    service = StorageService(str(tmp_path))
+    monkeypatch.setattr(uploads, "storage_service", service)
+    return service
@@ -0,0 +1,20 @@
+"""
+Tests for the health check endpoint.
+"""
+
+
+class TestHealthEndpoint:
+    """Test cases for the health check endpoint."""
+    
+    def test_health_check(self, client):
+        """Test that GET /health reports the API as healthy."""
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["status"] == "healthy"
+    
+    def test_health_check_head(self, client):
+        """Test that HEAD /health returns 200 without a body."""
+        response = client.head("/health")
+        assert response.status_code == 200
+        assert response.content == b""
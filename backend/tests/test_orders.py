@@ -2,33 +2,59 @@
 Tests for order-related API endpoints.
 Following TDD approach - tests written before implementation.
 """
+import asyncio
+import json
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from httpx import ASGITransport, AsyncClient
+
+# Every order in these tests ships to the same address, so encode it once
+_SHIPPING = {
+    "street": "123 Main St",
+    "city": "New York",
+    "state": "NY",
+    "zip_code": "10001",
+    "country": "USA"
+}
+_SHIPPING_JSON = json.dumps(_SHIPPING).encode()
+
+
+def _post_order(client, items, headers=None):
+    """POST /orders with a body built around the pre-encoded shipping address"""
+    body = b'{"items":' + json.dumps(items).encode() + b',"shipping_address":' + _SHIPPING_JSON + b'}'
+    return client.post("/orders", content=body, headers={**(headers or {}), "content-type": "application/json"})
+
+
+# (method, path, JSON body) for every order endpoint that needs a logged-in user
+AUTH_CASES = [
+    pytest.param("post", "/orders", {
+        "items": [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 1}],
+        "shipping_address": _SHIPPING
+    }, id="create_order"),
+    pytest.param("get", "/orders", None, id="list_orders"),
+    pytest.param("get", "/orders/1", None, id="get_order"),
+    pytest.param("put", "/orders/1/status", {"status": "SHIPPED"}, id="update_status"),
+    pytest.param("post", "/orders/1/cancel", None, id="cancel_order"),
+]
 
 
 class TestOrderEndpoints:
     """Test cases for order API endpoints."""
     
-    def test_create_order_requires_authentication(self, client):
-        """Test that POST /orders requires authentication."""
-        order_data = {
-            "items": [
-                {"product_id": 1, "quantity": 2},
-                {"product_id": 2, "quantity": 1}
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
-        response = client.post("/orders", json=order_data)
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
+    def test_endpoints_require_authentication(self, client):
+        """Test that every order endpoint rejects unauthenticated requests with 401."""
+        # Fire all the cases concurrently on one event loop instead of one request per test
+        async def request_all():
+            async with AsyncClient(transport=ASGITransport(app=client.app), base_url="http://test") as ac:
+                return await asyncio.gather(*(
+                    ac.request(method, path, json=body)
+                    for method, path, body in (case.values for case in AUTH_CASES)
+                ))
+        
+        responses = asyncio.run(request_all())
+        statuses = {case.id: response.status_code for case, response in zip(AUTH_CASES, responses)}
+        assert statuses == {case.id: 401 for case in AUTH_CASES}  # Changed from 403 to 401 for JWT
     
-    def test_create_order_with_valid_data(self, client, auth_helper, test_db_service):
+    def test_create_order_with_valid_data(self, client, auth_helper, seeded_products):
         """Test creating an order with valid data (when authenticated)."""
         # Create authenticated user
         user_data, token = auth_helper.create_authenticated_user(
@@ -36,47 +62,14 @@ class TestOrderEndpoints:
             password="customerpass123"
         )
         
-        # Create test products first using the same database service as the app
-        db = test_db_service
-        
-        product1_data = {
-            "name": "Vintage Chanel Dress",
-            "description": "Beautiful vintage Chanel dress",
-            "price": 1500.00,
-            "category": "dresses",
-            "images": ["image1.jpg"]
-        }
-        product2_data = {
-            "name": "Vintage Hermes Bag",
-            "description": "Classic Hermes handbag",
-            "price": 2500.00,
-            "category": "bags",
-            "images": ["image2.jpg"]
-        }
-        
-        # Create products in database
-        product1 = db.create_product(product1_data)
-        product2 = db.create_product(product2_data)
-        
-        print(f"Created product1 with ID: {product1['id']}")
-        print(f"Created product2 with ID: {product2['id']}")
-        
-        order_data = {
-            "items": [
-                {"product_id": product1["id"], "quantity": 2},
-                {"product_id": product2["id"], "quantity": 1}
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
+        # Dress (1500.00) x2 and bag (2500.00) x1 from the seeded catalog
+        order_items = [
+            {"product_id": seeded_products["dress"], "quantity": 2},
+            {"product_id": seeded_products["bag"], "quantity": 1}
+        ]
         
         # Test creating order with authentication
-        response = client.post("/orders", json=order_data, 
+        response = _post_order(client, order_items,
                               headers=auth_helper.get_auth_headers("customer@example.com"))
         # Should return 201 for successful order creation
         if response.status_code != 201:
@@ -89,139 +82,98 @@ class TestOrderEndpoints:
         assert "total_amount" in data
         assert "status" in data
         assert data["status"] == "PENDING"
+        assert data["total_amount"] == 5500.00
+        assert all(item["id"] is not None for item in data["items"])
     
-    def test_create_order_with_invalid_product_id(self, client, auth_helper, test_db_service):
+    def test_create_order_with_invalid_product_id(self, client, default_headers):
         """Test creating order with non-existent product returns 400."""
-        # Create authenticated user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="customer2@example.com",
-            password="customerpass123"
-        )
-        
-        order_data = {
-            "items": [
-                {"product_id": 99999, "quantity": 1}  # Non-existent product
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
+        order_items = [
+            {"product_id": 99999, "quantity": 1}  # Non-existent product
+        ]
         
         # Test with authentication - should get 400 (Bad Request) for invalid product
-        response = client.post("/orders", json=order_data, 
-                              headers=auth_helper.get_auth_headers("customer2@example.com"))
+        response = _post_order(client, order_items, headers=default_headers)
         assert response.status_code == 400
         data = response.json()
         assert "Product with ID 99999 not found" in data["detail"]
     
-    def test_create_order_with_zero_quantity(self, client, auth_helper, test_db_service):
+    def test_create_order_with_zero_quantity(self, client, default_headers, seeded_products):
         """Test that zero quantity returns 422 (validation error)."""
-        # Create authenticated user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="customer3@example.com",
-            password="customerpass123"
-        )
-        
-        # Create a test product first
-        product_data = {
-            "name": "Test Product Zero",
-            "description": "Test product for zero quantity test",
-            "price": 100.00,
-            "category": "test",
-            "images": ["test_zero.jpg"]
-        }
-        product = test_db_service.create_product(product_data)
-        
-        order_data = {
-            "items": [
-                {"product_id": product["id"], "quantity": 0}  # Invalid quantity
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
+        order_items = [
+            {"product_id": seeded_products["test"], "quantity": 0}  # Invalid quantity
+        ]
         
         # Test with authentication - should get 422 (Unprocessable Entity) for validation error
-        response = client.post("/orders", json=order_data, 
-                              headers=auth_helper.get_auth_headers("customer3@example.com"))
+        response = _post_order(client, order_items, headers=default_headers)
         assert response.status_code == 422  # Pydantic validation error
     
-    def test_get_user_orders_requires_authentication(self, client):
-        """Test that GET /orders requires authentication."""
-        response = client.get("/orders")
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_get_user_orders_with_valid_token(self, client, auth_helper, test_db_service):
+    def test_get_user_orders_with_valid_token(self, client, default_headers):
         """Test getting user orders with valid token."""
-        # Create authenticated user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="customer4@example.com",
-            password="customerpass123"
-        )
-        
         # Test getting orders with authentication
-        response = client.get("/orders", headers=auth_helper.get_auth_headers("customer4@example.com"))
+        response = client.get("/orders", headers=default_headers)
         # Should return 200 with empty list for new user
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
         assert len(data) == 0
     
-    def test_get_single_order_requires_authentication(self, client):
-        """Test that GET /orders/{id} requires authentication."""
-        response = client.get("/orders/1")
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_get_single_order_with_valid_token(self, client, auth_helper, test_db_service):
-        """Test getting single order with valid token."""
-        # Create authenticated user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="customer5@example.com",
+    def test_get_user_orders_query_count_is_constant(self, client, auth_helper, seeded_products, sql_counter):
+        """Test that GET /orders does not issue a query per order or per item."""
+        auth_helper.create_authenticated_user(
+            email="manyorders@example.com",
             password="customerpass123"
         )
+        headers = auth_helper.get_auth_headers("manyorders@example.com")
+        
+        order_items = [{"product_id": seeded_products[key], "quantity": 1} for key in ("test", "test2")]
+        for _ in range(3):
+            assert _post_order(client, order_items, headers=headers).status_code == 201
         
+        with sql_counter() as statements:
+            response = client.get("/orders", headers=headers)
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        # Current user + orders + their items, independent of order/item count
+        selects = statements.selects()
+        assert len(selects) <= 3
+    
+    def test_get_single_order_with_valid_token(self, client, default_headers):
+        """Test getting single order with valid token."""
         # Test getting single order with authentication
-        response = client.get("/orders/1", headers=auth_helper.get_auth_headers("customer5@example.com"))
+        response = client.get("/orders/1", headers=default_headers)
         # Should return 404 for non-existent order
         assert response.status_code == 404
         data = response.json()
         assert "Order not found" in data["detail"]
     
-    def test_get_order_from_different_user_returns_403(self, client, auth_helper, test_db_service):
+    def test_get_order_from_different_user_returns_404(self, client, auth_helper, seeded_products):
         """Test that users can only access their own orders."""
-        # Create authenticated user
-        user_data, token = auth_helper.create_authenticated_user(
+        # Create the order owner and another authenticated user
+        auth_helper.create_authenticated_user(
+            email="owner@example.com",
+            password="customerpass123"
+        )
+        auth_helper.create_authenticated_user(
             email="customer6@example.com",
             password="customerpass123"
         )
         
-        # Test getting order with authentication
-        response = client.get("/orders/1", headers=auth_helper.get_auth_headers("customer6@example.com"))
-        # Should return 404 for non-existent order
+        order_items = [
+            {"product_id": seeded_products["test"], "quantity": 1}
+        ]
+        create_response = _post_order(client, order_items,
+                              headers=auth_helper.get_auth_headers("owner@example.com"))
+        assert create_response.status_code == 201
+        order_id = create_response.json()["id"]
+        
+        # Another user's order is indistinguishable from a missing one
+        response = client.get(f"/orders/{order_id}", headers=auth_helper.get_auth_headers("customer6@example.com"))
         assert response.status_code == 404
         data = response.json()
         assert "Order not found" in data["detail"]
     
-    def test_update_order_status_requires_authentication(self, client):
-        """Test that PUT /orders/{id}/status requires authentication."""
-        status_data = {"status": "shipped"}
-        response = client.put("/orders/1/status", json=status_data)
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_cancel_order_requires_authentication(self, client):
-        """Test that POST /orders/{id}/cancel requires authentication."""
-        response = client.post("/orders/1/cancel")
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_update_order_status_with_valid_data(self, client, auth_helper, test_db_service):
+    def test_update_order_status_with_valid_data(self, client, auth_helper, make_order):
         """Test updating order status with valid data."""
         # Create authenticated user
         user_data, token = auth_helper.create_authenticated_user(
@@ -229,34 +181,8 @@ class TestOrderEndpoints:
             password="customerpass123"
         )
         
-        # Create a test product first
-        product_data = {
-            "name": "Test Product",
-            "description": "Test product for order",
-            "price": 100.00,
-            "category": "test",
-            "images": ["test.jpg"]
-        }
-        product = test_db_service.create_product(product_data)
-        
         # First create an order
-        order_data = {
-            "items": [
-                {"product_id": product["id"], "quantity": 2}
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
-        
-        create_response = client.post("/orders", json=order_data, 
-                                   headers=auth_helper.get_auth_headers("customer7@example.com"))
-        assert create_response.status_code == 201
-        order_id = create_response.json()["id"]
+        order_id = make_order(user_data["id"], [("test", 2)])
         
         # Update order status
         status_data = {"status": "CONFIRMED"}
@@ -270,7 +196,7 @@ class TestOrderEndpoints:
         assert "Order status updated successfully" in data["message"]
         assert data["new_status"] == "CONFIRMED"
     
-    def test_cancel_order_with_valid_data(self, client, auth_helper, test_db_service):
+    def test_cancel_order_with_valid_data(self, client, auth_helper, make_order):
         """Test cancelling an order with valid data."""
         # Create authenticated user
         user_data, token = auth_helper.create_authenticated_user(
@@ -278,34 +204,8 @@ class TestOrderEndpoints:
             password="customerpass123"
         )
         
-        # Create a test product first
-        product_data = {
-            "name": "Test Product 2",
-            "description": "Test product for order 2",
-            "price": 200.00,
-            "category": "test",
-            "images": ["test2.jpg"]
-        }
-        product = test_db_service.create_product(product_data)
-        
         # First create an order
-        order_data = {
-            "items": [
-                {"product_id": product["id"], "quantity": 1}
-            ],
-            "shipping_address": {
-                "street": "123 Main St",
-                "city": "New York",
-                "state": "NY",
-                "zip_code": "10001",
-                "country": "USA"
-            }
-        }
-        
-        create_response = client.post("/orders", json=order_data, 
-                                   headers=auth_helper.get_auth_headers("customer8@example.com"))
-        assert create_response.status_code == 201
-        order_id = create_response.json()["id"]
+        order_id = make_order(user_data["id"], [("test2", 1)])
         
         # Cancel the order
         response = client.post(f"/orders/{order_id}/cancel",
@@ -317,3 +217,17 @@ class TestOrderEndpoints:
         data = response.json()
         assert "Order cancelled successfully" in data["message"]
         assert data["status"] == "CANCELLED"
+        
+        # An already cancelled order can't be cancelled again
+        response = client.post(f"/orders/{order_id}/cancel",
+                             headers=auth_helper.get_auth_headers("customer8@example.com"))
+        assert response.status_code == 400
+        
+        # Other users can't see the order at all
+        auth_helper.create_authenticated_user(
+            email="customer9@example.com",
+            password="customerpass123"
+        )
+        response = client.post(f"/orders/{order_id}/cancel",
+                             headers=auth_helper.get_auth_headers("customer9@example.com"))
+        assert response.status_code == 404
@@ -3,31 +3,45 @@ Tests for product-related API endpoints.
 Following TDD approach - tests written before implementation.
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from datetime import datetime, timedelta
 # from app.database import db  # We'll use test_db_service instead
+from app.cache import product_cache
 from app.models import Product
 
 
-class TestProductEndpoints:
-    """Test cases for product API endpoints."""
+# (method, path, JSON body) for every product endpoint that needs a logged-in admin
+AUTH_CASES = [
+    pytest.param("post", "/products", {
+        "name": "Vintage Chanel Dress",
+        "description": "Beautiful vintage Chanel dress",
+        "price": 1500.00,
+        "category": "dresses",
+        "images": ["image1.jpg", "image2.jpg"]
+    }, id="create_product"),
+    pytest.param("put", "/products/1", {
+        "name": "Updated Vintage Chanel Dress",
+        "description": "Updated description",
+        "price": 1600.00,
+        "category": "dresses",
+        "images": []
+    }, id="update_product"),
+    pytest.param("delete", "/products/1", None, id="delete_product"),
+]
+
+
+class TestProductListing:
+    """Read-only GET /products tests sharing one catalog seeded for the whole class."""
     
-    def test_get_products_returns_list(self, client, test_db):
+    def test_get_products_returns_list(self, client, listing_catalog, sql_counter):
         """Test that GET /products returns paginated products with metadata."""
-        # Add some test products
-        test_products = [
-            Product(name="Test Product 1", description="Test Description 1", 
-                   price=100.00, category="test", is_available=True),
-            Product(name="Test Product 2", description="Test Description 2", 
-                   price=200.00, category="test", is_available=True)
-        ]
-        
-        for product in test_products:
-            test_db.add(product)
-        test_db.commit()
-        
-        response = client.get("/products")
+        with sql_counter() as statements:
+            response = client.get("/products")
         assert response.status_code == 200
+        # One COUNT for the total and one LIMITed page query, never the whole table
+        selects = statements.selects()
+        assert len(selects) == 2
+        assert any("count(" in statement.lower() for statement in selects)
+        assert any("LIMIT" in statement for statement in selects)
         data = response.json()
         # Should return paginated response with metadata
         assert isinstance(data, dict)
@@ -36,70 +50,101 @@ class TestProductEndpoints:
         assert "limit" in data
         assert "total" in data
         assert isinstance(data["items"], list)
-        assert len(data["items"]) == 2
-        assert data["total"] == 2
+        assert len(data["items"]) == len(listing_catalog)
+        assert data["total"] == len(listing_catalog)
     
-    def test_get_products_with_pagination(self, client, test_db):
-        """Test that GET /products supports pagination."""
-        # Add test products
-        test_products = [
-            Product(name="Test Product 1", description="Test Description 1", 
-                   price=100.00, category="test", is_available=True),
-            Product(name="Test Product 2", description="Test Description 2", 
-                   price=200.00, category="test", is_available=True)
-        ]
-        
-        for product in test_products:
-            test_db.add(product)
-        test_db.commit()
+    def test_get_products_with_pagination(self, client, listing_catalog, sql_counter):
+        """Test that GET /products pages by keyset cursor until next_cursor is None."""
+        response = client.get("/products?limit=3")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["items"]) == 3
+        assert isinstance(data["next_cursor"], str)
+        assert "offset" not in data
         
-        response = client.get("/products?page=1&limit=10")
+        with sql_counter() as statements:
+            response = client.get(f"/products?limit=3&cursor={data['next_cursor']}")
         assert response.status_code == 200
         data = response.json()
-        assert "items" in data
-        assert "total" in data
-        assert "page" in data
-        assert "limit" in data
+        assert len(data["items"]) == len(listing_catalog) - 3
+        assert data["next_cursor"] is None
+        # Cursor pages seek on the primary key instead of skipping rows by OFFSET
+        assert any("products.id <" in statement for statement in statements)
     
-    def test_get_products_with_category_filter(self, client, test_db):
+    def test_get_products_with_category_filter(self, client, listing_catalog):
         """Test that GET /products filters by category."""
-        # Add test products with different categories
-        test_products = [
-            Product(name="Dress 1", description="Test Dress", 
-                   price=100.00, category="dresses", is_available=True),
-            Product(name="Bag 1", description="Test Bag", 
-                   price=200.00, category="bags", is_available=True)
-        ]
-        
-        for product in test_products:
-            test_db.add(product)
-        test_db.commit()
-        
         response = client.get("/products?category=dresses")
         assert response.status_code == 200
         data = response.json()
         assert len(data["items"]) == 1
         assert data["items"][0]["category"] == "dresses"
     
-    def test_get_products_with_search(self, client, test_db):
+    def test_get_products_with_search(self, client, listing_catalog):
         """Test that GET /products supports search functionality."""
-        # Add test products
-        test_products = [
-            Product(name="Vintage Dress", description="Beautiful vintage dress", 
-                   price=100.00, category="dresses", is_available=True),
-            Product(name="Modern Bag", description="Modern handbag", 
-                   price=200.00, category="bags", is_available=True)
-        ]
-        
-        for product in test_products:
-            test_db.add(product)
-        test_db.commit()
-        
         response = client.get("/products?search=vintage")
         assert response.status_code == 200
         data = response.json()
         assert len(data["items"]) == 1
         assert "vintage" in data["items"][0]["name"].lower()
+
+
+class TestProductEndpoints:
+    """Test cases for product API endpoints."""
+    
+    def test_get_products_with_cursor(self, client, test_db):
+        """Test that GET /products pages through results with next_cursor without gaps or repeats."""
+        # created_at runs against id order, as with back-dated or imported rows
+        products = [
+            Product(name=f"Cursor Product {i}", description="Test Description",
+                    price=100.00, category="test", is_available=True,
+                    created_at=datetime(2020, 1, 1) - timedelta(days=i))
+            for i in range(5)
+        ]
+        test_db.add_all(products)
+        test_db.flush()
+        product_ids = [product.id for product in products]
+        test_db.commit()
+        
+        seen = []
+        response = client.get("/products?limit=2")
+        while True:
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(item["id"] for item in data["items"])
+            if data["next_cursor"] is None:
+                break
+            response = client.get(f"/products?limit=2&cursor={data['next_cursor']}")
+        
+        assert seen == sorted(product_ids, reverse=True)
+        
+        response = client.get("/products?cursor=not-a-cursor")
+        assert response.status_code == 400
+        # A failed load must not leave its per-key lock behind
+        assert product_cache._loading == {}
+    
+    def test_product_images_do_not_add_queries(self, client, test_db, sql_counter):
+        """Test that reading products with images stays at a constant query count."""
+        test_db.add_all([
+            Product(name=f"Imaged Product {i}", description="Test Description",
+                    price=100.00, category="test", is_available=True,
+                    images=[f"/uploads/products/{i}_{n}.jpg" for n in range(3)])
+            for i in range(20)
+        ])
+        test_db.commit()
+        
+        with sql_counter() as statements:
+            response = client.get("/products?limit=20")
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == 20
+        assert all(len(item["images"]) == 3 for item in items)
+        assert len(statements.selects()) == 2
+        
+        with sql_counter() as statements:
+            response = client.get(f"/products/{items[0]['id']}")
+        assert response.status_code == 200
+        assert len(response.json()["images"]) == 3
+        assert len(statements.selects()) == 1
     
     def test_get_single_product(self, client, test_db):
         """Test that GET /products/{id} returns a single product."""
@@ -117,43 +162,93 @@ class TestProductEndpoints:
         assert "price" in data
         assert "description" in data
     
+    def test_get_single_product_not_modified(self, client, test_db):
+        """Test that GET /products/{id} honours If-None-Match with a 304."""
+        test_product = Product(name="Cached Product", description="Test Description", 
+                             price=100.00, category="test", is_available=True)
+        test_db.add(test_product)
+        test_db.commit()
+        
+        response = client.get(f"/products/{test_product.id}")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        
+        cached_response = client.get(f"/products/{test_product.id}", headers={"If-None-Match": etag})
+        assert cached_response.status_code == 304
+        assert cached_response.content == b""
+        assert cached_response.headers["etag"] == etag
+    
+    def test_get_products_not_modified(self, client, test_db):
+        """Test that GET /products honours If-None-Match with a 304."""
+        test_db.add(Product(name="Listed Product", description="Test Description", 
+                           price=100.00, category="test", is_available=True))
+        test_db.commit()
+        
+        response = client.get("/products?category=test")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        
+        cached_response = client.get("/products?category=test", headers={"If-None-Match": etag})
+        assert cached_response.status_code == 304
+        
+        # Different query parameters produce a different representation
+        other_response = client.get("/products?category=other", headers={"If-None-Match": etag})
+        assert other_response.status_code == 200
+    
+    def test_get_products_etag_changes_after_product_write(self, client, admin_headers):
+        """Test that a product write invalidates the GET /products ETag."""
+        response = client.get("/products")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=30"
+        etag = response.headers["etag"]
+        
+        product_data = {
+            "name": "New Arrival",
+            "description": "Just listed",
+            "price": 120.00,
+            "category": "dresses",
+            "images": []
+        }
+        response = client.post("/products", json=product_data,
+                              headers=admin_headers)
+        assert response.status_code == 201
+        
+        response = client.get("/products", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["total"] == 1
+    
     def test_get_nonexistent_product_returns_404(self, client, test_db):
         """Test that GET /products/{id} returns 404 for non-existent product."""
         response = client.get("/products/99999")
         assert response.status_code == 404
         assert "detail" in response.json()
     
-    def test_create_product_requires_authentication(self, client):
-        """Test that POST /products requires authentication."""
-        product_data = {
-            "name": "Vintage Chanel Dress",
-            "description": "Beautiful vintage Chanel dress",
-            "price": 1500.00,
-            "category": "dresses",
-            "images": ["image1.jpg", "image2.jpg"]
-        }
-        response = client.post("/products", json=product_data)
+    def test_product_not_found_is_not_cached(self, client, test_db):
+        """Test that a 404 is not cached, so a product created elsewhere shows up at once."""
+        response = client.get("/products/99999")
+        assert response.status_code == 404
+        
+        # Inserted behind the API, as another worker would, so the cache is not invalidated
+        test_db.add(Product(id=99999, name="Late Product", description="Test Description",
+                            price=100.00, category="test", is_available=True))
+        test_db.commit()
+        
+        response = client.get("/products/99999")
+        assert response.status_code == 200
+        assert response.json()["name"] == "Late Product"
+    
+    @pytest.mark.parametrize("method,path,body", AUTH_CASES)
+    def test_write_endpoints_require_authentication(self, client, method, path, body):
+        """Test that product write endpoints reject unauthenticated requests with 401."""
+        response = client.request(method, path, json=body)
         assert response.status_code == 401  # Changed from 403 to 401 for JWT
     
-    def test_create_product_with_valid_data(self, client, auth_helper):
+    def test_create_product_with_valid_data(self, client, admin_headers, sample_product_payload):
         """Test creating a product with valid data (when authenticated)."""
-        # Create admin user
-        user_data, token = auth_helper.create_admin_user(
-            email="admin@example.com",
-            password="adminpass123"
-        )
-        
-        product_data = {
-            "name": "Vintage Chanel Dress",
-            "description": "Beautiful vintage Chanel dress",
-            "price": 1500.00,
-            "category": "dresses",
-            "images": ["image1.jpg", "image2.jpg"]
-        }
-        
         # Test creating product with authentication
-        response = client.post("/products", json=product_data, 
-                              headers=auth_helper.get_auth_headers("admin@example.com"))
+        response = client.post("/products", json=sample_product_payload, 
+                              headers=admin_headers)
         
         assert response.status_code == 201
         data = response.json()
@@ -165,26 +260,8 @@ class TestProductEndpoints:
         assert len(data["images"]) == 2
         assert data["is_available"] == True
     
-    def test_update_product_requires_authentication(self, client):
-        """Test that PUT /products/{id} requires authentication."""
-        product_data = {
-            "name": "Updated Vintage Chanel Dress",
-            "description": "Updated description",
-            "price": 1600.00,
-            "category": "dresses",
-            "images": []
-        }
-        response = client.put("/products/1", json=product_data)
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_update_product_with_valid_data(self, client, auth_helper, test_db):
+    def test_update_product_with_valid_data(self, client, admin_headers, test_db):
         """Test updating a product with valid data and authentication."""
-        # Create admin user
-        user_data, token = auth_helper.create_admin_user(
-            email="admin2@example.com",
-            password="adminpass123"
-        )
-        
         # Create a test product first
         test_product = Product(
             name="Original Product",
@@ -194,8 +271,9 @@ class TestProductEndpoints:
             is_available=True
         )
         test_db.add(test_product)
+        test_db.flush()
+        product_id = test_product.id
         test_db.commit()
-        test_db.refresh(test_product)
         
         # Update the product
         update_data = {
@@ -207,9 +285,9 @@ class TestProductEndpoints:
         }
         
         response = client.put(
-            f"/products/{test_product.id}",
+            f"/products/{product_id}",
             json=update_data,
-            headers=auth_helper.get_auth_headers("admin2@example.com")
+            headers=admin_headers
         )
         
         assert response.status_code == 200
@@ -221,44 +299,55 @@ class TestProductEndpoints:
         assert len(data["images"]) == 2
         assert data["is_available"] == True
     
-    def test_update_nonexistent_product_returns_404(self, client, auth_helper):
-        """Test that updating a non-existent product returns 404."""
-        # Create admin user
-        user_data, token = auth_helper.create_admin_user(
-            email="admin3@example.com",
-            password="adminpass123"
+    def test_product_reads_are_cached_until_update(self, client, admin_headers, test_db, sql_counter):
+        """Test that repeated product reads skip the database until a product is updated."""
+        test_product = Product(
+            name="Cached Product",
+            description="Cached Description",
+            price=100.00,
+            category="test",
+            is_available=True
         )
+        test_db.add(test_product)
+        test_db.flush()
+        product_id = test_product.id
+        test_db.commit()
+        
+        assert client.get(f"/products/{product_id}").json()["name"] == "Cached Product"
+        with sql_counter() as statements:
+            response = client.get(f"/products/{product_id}")
+        assert response.json()["name"] == "Cached Product"
+        assert statements == []
         
         update_data = {
-            "name": "Updated Product",
-            "description": "Updated Description",
-            "price": 150.00,
+            "name": "Renamed Product",
+            "description": "Cached Description",
+            "price": 100.00,
             "category": "test",
             "images": []
         }
+        response = client.put(
+            f"/products/{product_id}",
+            json=update_data,
+            headers=admin_headers
+        )
+        assert response.status_code == 200
         
+        assert client.get(f"/products/{product_id}").json()["name"] == "Renamed Product"
+    
+    def test_update_nonexistent_product_returns_404(self, client, admin_headers, sample_product_payload):
+        """Test that updating a non-existent product returns 404."""
         response = client.put(
             "/products/99999",
-            json=update_data,
-            headers=auth_helper.get_auth_headers("admin3@example.com")
+            json=sample_product_payload,
+            headers=admin_headers
         )
         
         assert response.status_code == 404
         assert "detail" in response.json()
     
-    def test_delete_product_requires_authentication(self, client):
-        """Test that DELETE /products/{id} requires authentication."""
-        response = client.delete("/products/1")
-        assert response.status_code == 401  # Changed from 403 to 401 for JWT
-    
-    def test_delete_product_with_valid_auth(self, client, auth_helper, test_db):
+    def test_delete_product_with_valid_auth(self, client, admin_headers, test_db):
         """Test deleting a product with valid authentication (soft delete)."""
-        # Create admin user
-        user_data, token = auth_helper.create_admin_user(
-            email="admin4@example.com",
-            password="adminpass123"
-        )
-        
         # Create a test product first
         test_product = Product(
             name="Product To Delete",
@@ -268,37 +357,32 @@ class TestProductEndpoints:
             is_available=True
         )
         test_db.add(test_product)
+        test_db.flush()
+        product_id = test_product.id
         test_db.commit()
-        test_db.refresh(test_product)
         
         # Delete the product
         response = client.delete(
-            f"/products/{test_product.id}",
-            headers=auth_helper.get_auth_headers("admin4@example.com")
+            f"/products/{product_id}",
+            headers=admin_headers
         )
         
         assert response.status_code == 200
         data = response.json()
-        assert data["id"] == test_product.id
+        assert data["id"] == product_id
         assert data["is_available"] == False  # Should be soft-deleted
         
         # Verify the product still exists but is unavailable
-        get_response = client.get(f"/products/{test_product.id}")
+        get_response = client.get(f"/products/{product_id}")
         assert get_response.status_code == 200
         product_data = get_response.json()
         assert product_data["is_available"] == False
     
-    def test_delete_nonexistent_product_returns_404(self, client, auth_helper):
+    def test_delete_nonexistent_product_returns_404(self, client, admin_headers):
         """Test that deleting a non-existent product returns 404."""
-        # Create admin user
-        user_data, token = auth_helper.create_admin_user(
-            email="admin5@example.com",
-            password="adminpass123"
-        )
-        
         response = client.delete(
             "/products/99999",
-            headers=auth_helper.get_auth_headers("admin5@example.com")
+            headers=admin_headers
         )
         
         assert response.status_code == 404
@@ -0,0 +1,172 @@
+"""
+Tests for the local image storage service.
+"""
+import io
+import os
+
+import pytest
+
+from app import storage
+from app.storage import StorageService
+
+
+@pytest.fixture(scope="function")
+def storage_service(tmp_path):
+    """A StorageService rooted in a temporary directory"""
+    return StorageService(str(tmp_path))
+
+
+def _read_stored(service, url_path):
+    """Read back a stored file from its URL path"""
+    with open(os.path.join(service._base_str, url_path[len("/uploads/"):]), "rb") as f:
+        return f.read()
+
+
+class TestSaveImagesBatch:
+    """Test cases for StorageService.save_images_batch."""
+    
+    @pytest.mark.parametrize("supports_dir_fd", [
+        pytest.param(True, id="dir_fd"),
+        pytest.param(False, id="path_fallback"),
+    ])
+    def test_batch_writes_every_file_in_order(self, storage_service, monkeypatch, supports_dir_fd):
+        """Test that every file is written under a unique name, with or without dir_fd support."""
+        if supports_dir_fd and not storage._SUPPORTS_DIR_FD:
+            pytest.skip("dir_fd is not supported on this platform")
+        monkeypatch.setattr(storage, "_SUPPORTS_DIR_FD", supports_dir_fd)
+        bodies = [b"first" * 10, b"second" * 10, b""]
+        
+        url_paths = storage_service.save_images_batch(
+            [(io.BytesIO(body), ext) for body, ext in zip(bodies, [".png", ".jpg", ".webp"])]
+        )
+        
+        assert len(set(url_paths)) == 3
+        assert [os.path.splitext(path)[1] for path in url_paths] == [".png", ".jpg", ".webp"]
+        assert [_read_stored(storage_service, path) for path in url_paths] == bodies
+    
+    def test_batch_refuses_to_overwrite(self, storage_service, monkeypatch):
+        """Test that a name collision fails instead of overwriting an existing file."""
+        monkeypatch.setattr(StorageService, "_unique_name", staticmethod(lambda file_ext: f"fixed{file_ext}"))
+        storage_service.save_images_batch([(io.BytesIO(b"original"), ".png")])
+        
+        with pytest.raises(FileExistsError):
+            storage_service.save_images_batch([(io.BytesIO(b"replacement"), ".png")])
+        assert _read_stored(storage_service, "/uploads/products/fixed.png") == b"original"
+    
+    def test_save_image_stores_bytes(self, storage_service):
+        """Test that save_image writes bytes through the batch path."""
+        url_path = storage_service.save_image(b"content", "photo.JPG")
+        assert url_path.endswith(".jpg")
+        assert _read_stored(storage_service, url_path) == b"content"
+
+
+class TestCopyImage:
+    """Test cases for StorageService.copy_image."""
+    
+    @pytest.mark.parametrize("missing", [
+        pytest.param((), id="copy_file_range"),
+        pytest.param(("copy_file_range",), id="sendfile"),
+        pytest.param(("copy_file_range", "sendfile"), id="read_write"),
+    ])
+    def test_copy_image(self, storage_service, monkeypatch, missing):
+        """Test that a stored image is copied under a new name by each copy strategy."""
+        for name in missing:
+            monkeypatch.delattr(os, name, raising=False)
+        body = os.urandom(3 * storage.COPY_BUFFER_SIZE // 2)
+        url_path = storage_service.save_image(body, "photo.png")
+        
+        copy_path = storage_service.copy_image(url_path)
+        
+        assert copy_path != url_path
+        assert copy_path.startswith("/uploads/products/")
+        assert copy_path.endswith(".png")
+        assert _read_stored(storage_service, copy_path) == body
+    
+    def test_copy_missing_image(self, storage_service):
+        """Test that copying a missing image raises FileNotFoundError and writes nothing."""
+        with pytest.raises(FileNotFoundError):
+            storage_service.copy_image("/uploads/products/missing.png")
+        assert os.listdir(storage_service.products_path) == []
+    
+    @pytest.mark.parametrize("url_path", [
+        "/uploads/../secret.png",
+        "/uploads/products/../../secret.png",
+        "/static/secret.png",
+    ])
+    def test_copy_rejects_paths_outside_uploads(self, tmp_path, url_path):
+        """Test that copy_image refuses paths that escape the upload directory."""
+        service = StorageService(str(tmp_path / "uploads"))
+        (tmp_path / "secret.png").write_bytes(b"secret")
+        
+        with pytest.raises(ValueError):
+            service.copy_image(url_path)
+        assert os.listdir(service.products_path) == []
+
+
+class TestOpenImageReadonly:
+    """Test cases for StorageService.open_image_readonly."""
+    
+    def test_maps_stored_image(self, storage_service):
+        """Test that a stored image is mapped read-only with its full content."""
+        body = os.urandom(8192)
+        url_path = storage_service.save_image(body, "photo.png")
+        
+        mapped = storage_service.open_image_readonly(url_path)
+        try:
+            assert mapped[:] == body
+            with pytest.raises(TypeError):
+                mapped[0] = 0
+        finally:
+            mapped.close()
+    
+    def test_empty_or_missing_image_returns_none(self, storage_service):
+        """Test that empty and missing files are reported as None."""
+        url_path = storage_service.save_image(b"", "empty.png")
+        assert storage_service.open_image_readonly(url_path) is None
+        assert storage_service.open_image_readonly("/uploads/products/missing.png") is None
+    
+    def test_rejects_paths_outside_uploads(self, tmp_path):
+        """Test that paths escaping the upload directory are not opened."""
+        service = StorageService(str(tmp_path / "uploads"))
+        (tmp_path / "secret.png").write_bytes(b"secret")
+        
+        assert service.open_image_readonly("/uploads/../secret.png") is None
+        assert service.open_image_readonly("/uploads/products/../../secret.png") is None
+
+
+class TestDeleteAndSize:
+    """Test cases for StorageService.delete_image and get_file_size."""
+    
+    def test_size_then_delete(self, storage_service):
+        """Test that a stored image reports its size and can be deleted once."""
+        url_path = storage_service.save_image(b"12345", "photo.png")
+        assert storage_service.get_file_size(url_path) == 5
+        
+        assert storage_service.delete_image(url_path) is True
+        assert storage_service.get_file_size(url_path) is None
+        assert storage_service.delete_image(url_path) is False
+    
+    def test_rejects_paths_outside_uploads(self, tmp_path):
+        """Test that paths escaping the upload directory are neither measured nor deleted."""
+        service = StorageService(str(tmp_path / "uploads"))
+        secret = tmp_path / "secret.png"
+        secret.write_bytes(b"secret")
+        
+        for url_path in ("/uploads/../secret.png", "/uploads/products/../../secret.png"):
+            assert service.get_file_size(url_path) is None
+            assert service.delete_image(url_path) is False
+        assert secret.exists()
+
+
+class TestValidateImageFile:
+    """Test cases for StorageService.validate_image_file."""
+    
+    def test_allowed_extension_without_signature_fails_closed(self, tmp_path, monkeypatch):
+        """Test that content is rejected for an allowed extension with no known magic bytes."""
+        monkeypatch.setattr(storage, "get_allowed_file_types", lambda: {".png", ".gif"})
+        service = StorageService(str(tmp_path))
+        
+        is_valid, error = service.validate_image_file("anything.gif", 100, b"not an image")
+        assert not is_valid
+        assert "cannot be verified" in error
+
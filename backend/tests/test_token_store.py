@@ -0,0 +1,41 @@
+"""
+Tests for the JWT revocation store.
+"""
+import sys
+import time
+
+import pytest
+
+from app.token_store import MemoryRevocationStore, RedisRevocationStore
+
+
+class TestMemoryRevocationStore:
+    """Test cases for the process-local revocation store."""
+    
+    def test_revoked_token_is_reported_until_expiry(self):
+        """Test that a revoked jti is revoked until its expiry and not after."""
+        store = MemoryRevocationStore()
+        store.revoke("live", time.time() + 60)
+        store.revoke("expired", time.time() - 1)
+        assert store.is_revoked("live")
+        assert not store.is_revoked("expired")
+        assert not store.is_revoked("unknown")
+    
+    def test_revoke_sweeps_expired_entries(self):
+        """Test that expired entries are dropped even if their token is never checked again."""
+        store = MemoryRevocationStore()
+        for n in range(100):
+            store.revoke(f"old-{n}", time.time() - 1)
+        store.revoke("live", time.time() + 60)
+        assert len(store._revoked) == 1
+        assert store.is_revoked("live")
+
+
+class TestRedisRevocationStore:
+    """Test cases for the Redis-backed revocation store."""
+    
+    def test_missing_redis_package_is_a_configuration_error(self, monkeypatch):
+        """Test that REDIS_URL without the redis package fails with a clear error."""
+        monkeypatch.setitem(sys.modules, "redis", None)
+        with pytest.raises(RuntimeError, match="redis package is not installed"):
+            RedisRevocationStore("redis://localhost:6379/0")
@@ -0,0 +1,137 @@
+"""
+Tests for the product image upload endpoint.
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.routers.uploads import upload_product_images
+from app.storage import COPY_BUFFER_SIZE
+
+
+# Leading bytes of a PNG file, enough for the magic-byte check
+PNG_HEADER = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+
+
+def _read_stored(storage, url_path):
+    """Read back a stored upload from its URL path"""
+    with open(os.path.join(storage._base_str, url_path[len("/uploads/"):]), "rb") as f:
+        return f.read()
+
+
+class TestUploadEndpoints:
+    """Test cases for the product image upload endpoint."""
+    
+    def test_upload_writes_file(self, client, admin_headers, upload_storage):
+        """Test that an uploaded image is written to disk byte for byte."""
+        body = PNG_HEADER + os.urandom(4096)
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", ("photo.png", body, "image/png"))],
+            headers=admin_headers
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert data["errors"] == []
+        (url_path,) = data["uploaded_paths"]
+        assert url_path.startswith("/uploads/products/")
+        assert url_path.endswith(".png")
+        assert _read_stored(upload_storage, url_path) == body
+    
+    def test_upload_saves_multiple_files(self, client, admin_headers, upload_storage):
+        """Test that several valid images are stored in the order they were sent."""
+        bodies = [PNG_HEADER + bytes([n]) * 100 for n in range(3)]
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", (f"photo{n}.png", body, "image/png")) for n, body in enumerate(bodies)],
+            headers=admin_headers
+        )
+        assert response.status_code == 201
+        url_paths = response.json()["uploaded_paths"]
+        assert [_read_stored(upload_storage, path) for path in url_paths] == bodies
+    
+    def test_upload_rejects_mismatched_content(self, client, admin_headers, upload_storage):
+        """Test that a PNG body sent with a .jpg name is rejected and not stored."""
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", ("photo.jpg", PNG_HEADER + b"\x00" * 100, "image/jpeg"))],
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+        assert "does not match its extension" in response.json()["detail"]
+        assert os.listdir(upload_storage.products_path) == []
+    
+    def test_upload_rejects_oversized_file(self, client, admin_headers, upload_storage):
+        """Test that a file over the size limit is rejected and not stored."""
+        body = PNG_HEADER + b"\x00" * upload_storage._max_bytes
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", ("huge.png", body, "image/png"))],
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+        assert "File too large" in response.json()["detail"]
+        assert os.listdir(upload_storage.products_path) == []
+    
+    def test_upload_requires_admin(self, client, default_headers, upload_storage):
+        """Test that non-admin users cannot upload images."""
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", ("photo.png", PNG_HEADER, "image/png"))],
+            headers=default_headers
+        )
+        assert response.status_code == 403
+        assert os.listdir(upload_storage.products_path) == []
+    
+    def test_upload_streams_file_larger_than_copy_buffer(self, client, admin_headers, upload_storage):
+        """Test that a file spanning several copy chunks is stored at its full size."""
+        body = PNG_HEADER + os.urandom(2 * COPY_BUFFER_SIZE + 123)
+        response = client.post(
+            "/upload/product-images",
+            files=[("files", ("large.png", body, "image/png"))],
+            headers=admin_headers
+        )
+        assert response.status_code == 201
+        (url_path,) = response.json()["uploaded_paths"]
+        assert upload_storage.get_file_size(url_path) == len(body)
+        assert _read_stored(upload_storage, url_path) == body
+    
+    def test_upload_without_recorded_size(self, upload_storage):
+        """Test that an upload whose size the parser did not record is measured from the spool."""
+        body = PNG_HEADER + os.urandom(COPY_BUFFER_SIZE + 123)
+        spool = tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_SIZE)
+        spool.write(body)
+        spool.seek(0)
+        upload = UploadFile(file=spool, filename="spooled.png")
+        assert upload.size is None
+        
+        try:
+            result = asyncio.run(upload_product_images(files=[upload], current_user=None))
+        finally:
+            spool.close()
+        
+        assert result.errors == []
+        (url_path,) = result.uploaded_paths
+        assert upload_storage.get_file_size(url_path) == len(body)
+        assert _read_stored(upload_storage, url_path) == body
+    
+    def test_oversized_upload_without_recorded_size(self, upload_storage):
+        """Test that the spool-measured size is still checked against the limit."""
+        spool = tempfile.SpooledTemporaryFile(max_size=COPY_BUFFER_SIZE)
+        spool.write(PNG_HEADER + b"\x00" * upload_storage._max_bytes)
+        spool.seek(0)
+        upload = UploadFile(file=spool, filename="huge.png")
+        
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(upload_product_images(files=[upload], current_user=None))
+        finally:
+            spool.close()
+        
+        assert exc_info.value.status_code == 400
+        assert "File too large" in exc_info.value.detail
+        assert os.listdir(upload_storage.products_path) == []
+
@@ -3,10 +3,10 @@ Tests for user-related API endpoints.
 Following TDD approach - tests written before implementation.
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
-# from app.database import db  # We'll use test_db_service instead
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from app.models import User
+# from app.database import db  # We'll use test_db_service instead
 
 
 class TestUserEndpoints:
@@ -57,6 +57,18 @@ class TestUserEndpoints:
         response = client.post("/auth/register", json=user_data)
         assert response.status_code == 422  # Pydantic validation error
     
+    def test_register_user_with_unknown_field(self, client):
+        """Test that unexpected fields in the registration body return 422."""
+        user_data = {
+            "email": "extra@example.com",
+            "password": "securepassword123",
+            "first_name": "John",
+            "last_name": "Doe",
+            "is_admin": True
+        }
+        response = client.post("/auth/register", json=user_data)
+        assert response.status_code == 422  # Pydantic validation error
+    
     def test_register_user_with_weak_password(self, client):
         """Test that weak password returns 422 (validation error) or 400."""
         user_data = {
@@ -94,36 +106,49 @@ class TestUserEndpoints:
         # Verify it's a real JWT token (not mock)
         assert data["access_token"] != "mock_jwt_token"
     
-    def test_login_with_invalid_credentials(self, client):
-        """Test login with invalid credentials returns 401."""
+    def test_login_with_invalid_credentials(self, client, test_db, sql_counter):
+        """Test login with invalid credentials returns 401 after one indexed email lookup."""
         login_data = {
             "email": "nonexistent@example.com",
             "password": "wrongpassword"
         }
-        response = client.post("/auth/login", json=login_data)
+        with sql_counter() as statements:
+            response = client.post("/auth/login", json=login_data)
         assert response.status_code == 401
+        
+        selects = statements.selects()
+        assert len(selects) == 1
+        assert "FROM users" in selects[0]
+        assert "users.email =" in selects[0]
+        if test_db.bind.dialect.name == "sqlite":
+            plan = test_db.connection().exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {selects[0]}", (login_data["email"],)
+            ).all()
+            assert any("USING INDEX" in row[-1] for row in plan)
+    
+    def test_login_with_malformed_email(self, client):
+        """Test that a malformed login email returns 422."""
+        login_data = {
+            "email": "not-an-email",
+            "password": "wrongpassword"
+        }
+        response = client.post("/auth/login", json=login_data)
+        assert response.status_code == 422  # Pydantic validation error
     
     def test_get_current_user_requires_authentication(self, client):
         """Test that GET /auth/me requires authentication."""
         response = client.get("/auth/me")
         assert response.status_code == 401  # Changed from 403 to 401 for JWT
     
-    def test_get_current_user_with_valid_token(self, client, auth_helper):
+    def test_get_current_user_with_valid_token(self, client, default_headers, seeded_user):
         """Test getting current user with valid token."""
-        # Create and login a user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="me@example.com",
-            password="testpass123"
-        )
-        
-        # Test /auth/me with valid token
-        response = client.get("/auth/me", headers=auth_helper.get_auth_headers("me@example.com"))
+        response = client.get("/auth/me", headers=default_headers)
         assert response.status_code == 200
         data = response.json()
-        assert data["email"] == "me@example.com"
-        assert data["first_name"] == "Test"
-        assert data["last_name"] == "User"
-        assert "id" in data
+        assert data["email"] == seeded_user["email"]
+        assert data["first_name"] == seeded_user["first_name"]
+        assert data["last_name"] == seeded_user["last_name"]
+        assert data["id"] == seeded_user["id"]
     
     def test_logout_requires_authentication(self, client):
         """Test that POST /auth/logout requires authentication."""
@@ -145,16 +170,27 @@ class TestUserEndpoints:
         assert "message" in data
         assert "logged out" in data["message"].lower()
     
-    def test_token_refresh(self, client, auth_helper):
-        """Test token refresh functionality."""
-        # Create and login a user
-        user_data, token = auth_helper.create_authenticated_user(
-            email="refresh@example.com",
+    def test_logout_revokes_token(self, client, auth_helper):
+        """Test that a token can no longer be used after logout."""
+        auth_helper.create_authenticated_user(
+            email="revoked@example.com",
             password="testpass123"
         )
+        headers = auth_helper.get_auth_headers("revoked@example.com")
+        token = headers["Authorization"].split(" ", 1)[1]
+        
+        response = client.post("/auth/logout", headers=headers)
+        assert response.status_code == 200
         
-        # Test token refresh
-        refresh_data = {"refresh_token": token}
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 401
+        
+        response = client.post("/auth/refresh", json={"refresh_token": token})
+        assert response.status_code == 401
+    
+    def test_token_refresh(self, client, default_headers, default_token):
+        """Test token refresh functionality."""
+        refresh_data = {"refresh_token": default_token}
         response = client.post("/auth/refresh", json=refresh_data)
         assert response.status_code == 200
         data = response.json()
@@ -169,3 +205,26 @@ class TestUserEndpoints:
         headers = {"Authorization": "Bearer invalid_token"}
         response = client.get("/auth/me", headers=headers)
         assert response.status_code == 401
+    
+    def test_admin_user_list_cursor_has_no_gaps(self, client, admin_headers, test_db):
+        """Test that GET /admin/users pages by next_cursor without gaps or repeats."""
+        # created_at runs against id order, as with back-dated or imported rows
+        test_db.add_all([
+            User(email=f"cursor{i}@example.com", password="!", first_name="Cursor",
+                 last_name="User", created_at=datetime(2020, 1, 1) - timedelta(days=i))
+            for i in range(5)
+        ])
+        test_db.commit()
+        user_ids = test_db.scalars(select(User.id)).all()
+        
+        seen = []
+        response = client.get("/admin/users?limit=2", headers=admin_headers)
+        while True:
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(item["id"] for item in data["items"])
+            if data["next_cursor"] is None:
+                break
+            response = client.get(f"/admin/users?limit=2&cursor={data['next_cursor']}", headers=admin_headers)
+        
+        assert seen == sorted(user_ids, reverse=True)